@@ -11,12 +11,9 @@ from smolagents import CodeAgent, DuckDuckGoSearchTool, LiteLLMRouterModel
 from .config import ConfigManager, config_dir
 from .tools.google import (
     add_google_account,
-    get_unread_emails_tool,
-    get_upcoming_events_tool,
+    get_accounts_section,
     initialize_all_google_auth,
     initialize_google_auth,
-    search_calendar_events_tool,
-    search_emails_tool,
 )
 from .tools.llm_text_processor import (
     SummarizingVisitWebpageTool,
@@ -196,10 +193,7 @@ async def send_message(
 async def setup_gmail_auth():
     """Initialize Google API authentication for all accounts."""
     # Get the number of accounts
-    config = ConfigManager().config
-    accounts = config.config.get("google", {}).get("accounts", [])
-    if not accounts:
-        accounts = config.config.get("gmail", {}).get("accounts", [])
+    accounts = get_accounts_section(ConfigManager().config)
 
     # Notify user that authentication is starting
     ui.notify(
@@ -352,6 +346,15 @@ def main(config: ConfigManager):
     # Create a closure for summarize_text using the process_text_tool
     text_processor, summarize_text = process_text_tool(config)
 
+    # The Gmail and Calendar tools load the Google API client, so they are
+    # only imported once the tools are built
+    from .tools.google import (
+        get_unread_emails_tool,
+        get_upcoming_events_tool,
+        search_calendar_events_tool,
+        search_emails_tool,
+    )
+
     # Initialize tools
     def reminder_callback(msg):
         message_queue.put(msg)
@@ -471,11 +474,7 @@ def main(config: ConfigManager):
                 )
 
                 # Account selection
-                accounts = config.config.get("google", {}).get("accounts", [])
-                if not accounts:
-                    accounts = config.config.get("gmail", {}).get(
-                        "accounts", []
-                    )
+                accounts = get_accounts_section(config.config)
 
                 account_options = {}
 
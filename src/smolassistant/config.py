@@ -48,7 +48,12 @@ DEFAULTS = {
         "timezone": "America/Chicago",
     },
     "reminders": {"db_path": "reminders.sqlite"},
-    "gmail": {"credentials_path": "credentials.json", "accounts": []},
+    "gmail": {
+        "credentials_path": "credentials.json",
+        "accounts": [],
+        # Only return unread emails that arrived since the previous check
+        "incremental_sync": False,
+    },
     "telegram": {
         "enabled": False,
         "token": "",
@@ -6,14 +6,6 @@ from .reminder import (
     cancel_reminder_tool,
 )
 from .google import (
-    # Gmail tools
-    get_unread_emails_tool,
-    search_emails_tool,
-    
-    # Calendar tools
-    get_upcoming_events_tool,
-    search_calendar_events_tool,
-    
     # Auth functions
     initialize_google_auth,
 )
@@ -41,4 +33,16 @@ __all__ = [
     'run_telegram_bot',
     'process_text_tool',
     'SummarizingVisitWebpageTool',
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    # The Google tool factories are resolved lazily by the google package,
+    # so they are not imported here with the rest of the tools
+    if name in (
+        'get_unread_emails_tool', 'search_emails_tool',
+        'get_upcoming_events_tool', 'search_calendar_events_tool',
+    ):
+        from . import google
+        return getattr(google, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,35 @@
-from .gmail_tool import get_unread_emails_tool, search_emails_tool
-from .gcal_tool import get_upcoming_events_tool, search_calendar_events_tool
 from .auth import (
     initialize_google_auth, initialize_all_google_auth, add_google_account,
-    GOOGLE_SCOPES
+    get_accounts_section, GOOGLE_SCOPES
 )
 
 __all__ = [
     # Gmail tools
     'get_unread_emails_tool',
     'search_emails_tool',
-    
+
     # Calendar tools
     'get_upcoming_events_tool',
     'search_calendar_events_tool',
-    
+
     # Auth functions
     'initialize_google_auth',
     'initialize_all_google_auth',
     'add_google_account',
-    
+    'get_accounts_section',
+
     # Scope constant
     'GOOGLE_SCOPES',
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    # Import the tool factories lazily so that importing this package does
+    # not pull in googleapiclient until a tool is actually needed
+    if name in ('get_unread_emails_tool', 'search_emails_tool'):
+        from . import gmail_tool
+        return getattr(gmail_tool, name)
+    if name in ('get_upcoming_events_tool', 'search_calendar_events_tool'):
+        from . import gcal_tool
+        return getattr(gcal_tool, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,120 @@
+import contextlib
+import datetime
 import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 
-from ...config import ConfigManager, config_dir
+from ...config import ConfigManager, config_dir, config_file
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl; byte-range locking via msvcrt is used instead
+    fcntl = None
+    import msvcrt
 
 # Define combined scopes for Google services
-GOOGLE_SCOPES = [
-    "https://www.googleapis.com/auth/gmail.readonly",
-    "https://www.googleapis.com/auth/calendar.readonly"
-]
+GMAIL_SCOPE = "https://www.googleapis.com/auth/gmail.readonly"
+CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar.readonly"
+GOOGLE_SCOPES = (GMAIL_SCOPE, CALENDAR_SCOPE)
+
+
+def _service_names(scopes):
+    """
+    Get a readable description of the Google services covered by scopes.
+
+    Args:
+        scopes: Sequence of OAuth scopes
+
+    Returns:
+        String such as "Gmail and Calendar"
+    """
+    scope_set = set(scopes)
+    names = []
+    if GMAIL_SCOPE in scope_set:
+        names.append("Gmail")
+    if CALENDAR_SCOPE in scope_set:
+        names.append("Calendar")
+    return " and ".join(names)
+
+
+# Services covered by GOOGLE_SCOPES, used in status messages
+SERVICE_NAMES = _service_names(GOOGLE_SCOPES)
+
+
+def get_accounts_section(config):
+    """
+    Get the list of configured Google accounts.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        List of account dictionaries from the 'google' section, falling
+        back to the old 'gmail' section
+    """
+    google = config.get("google")
+    if google and google.get("accounts"):
+        return google["accounts"]
+    gmail = config.get("gmail")
+    return gmail.get("accounts", []) if gmail else []
+
+
+# Account settings resolved from the config file, keyed by its mtime
+_accounts_cache = {"mtime": None, "accounts": None, "cred_path": None}
+
+
+def _config_mtime():
+    """Get the modification time of the config file, or None if missing."""
+    try:
+        return os.stat(config_file).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _resolve_accounts():
+    """
+    Resolve the Google account settings from the configuration.
+
+    The config file is only re-read when its modification time changes.
+
+    Returns:
+        Dictionary with the resolved "accounts" list of tuples
+        (account_name, token_path) and the "cred_path" of credentials.json
+    """
+    mtime = _config_mtime()
+    if mtime is None or mtime != _accounts_cache["mtime"]:
+        config = ConfigManager().config
+
+        accounts = [
+            (
+                account.get("name", "unnamed"),
+                os.path.join(config_dir, account.get("token_path")),
+            )
+            for account in get_accounts_section(config)
+        ]
+        cred_path = os.path.join(
+            config_dir,
+            config.get("google", {}).get("credentials_path", "credentials.json")
+        )
+
+        # Loading the config may have created or updated the file
+        _accounts_cache.update(
+            mtime=_config_mtime(), accounts=accounts, cred_path=cred_path
+        )
+
+    return _accounts_cache
 
 
 def get_credentials_path():
     """Get the path to the credentials.json file."""
-    config = ConfigManager().config
-    return os.path.join(
-        config_dir, 
-        config.get("google", {}).get("credentials_path", "credentials.json")
-    )
+    return _resolve_accounts()["cred_path"]
 
 
 def get_token_path_for_account(account_name):
@@ -41,29 +137,194 @@ def get_token_paths():
     Get all token paths from the configuration.
     Returns a list of tuples (account_name, token_path).
     """
-    config = ConfigManager().config
-    paths = []
-    
-    # Check for both old 'gmail' and new 'google' config sections
-    accounts_section = config.get("google", {}).get("accounts", [])
-    if not accounts_section:
-        accounts_section = config.get("gmail", {}).get("accounts", [])
-    
-    # Get paths from accounts
-    for account in accounts_section:
-        name = account.get("name", "unnamed")
-        token_path = os.path.join(config_dir, account.get("token_path"))
-        paths.append((name, token_path))
-    
-    return paths
+    return list(_resolve_accounts()["accounts"])
 
 
-def get_credentials():
+# Transport for token refreshes, reusing one pooled HTTPS session
+_refresh_request = Request(session=requests.Session())
+
+# Credentials loaded from each token file, keyed by token path. Each entry
+# holds the credentials, the token file's mtime and the time until which
+# the credentials are known to be valid.
+_creds_cache = {}
+
+# Seconds before the actual expiry at which credentials stop being trusted
+# without checking; larger than google-auth's own refresh threshold
+EXPIRY_MARGIN = 300
+
+
+def _cache_entry(creds, mtime):
+    """
+    Build a credentials cache entry.
+
+    Args:
+        creds: Loaded credentials
+        mtime: Modification time of the token file
+
+    Returns:
+        Dictionary with the credentials, mtime and expires_at timestamp
+    """
+    expires_at = 0
+    if creds and creds.valid and creds.expiry:
+        # google-auth stores the expiry as a naive UTC datetime
+        expiry = creds.expiry.replace(tzinfo=datetime.timezone.utc)
+        expires_at = expiry.timestamp() - EXPIRY_MARGIN
+    return {"creds": creds, "mtime": mtime, "expires_at": expires_at}
+
+
+def _token_signature(token_path):
+    """
+    Identify the current contents of a token file without reading it.
+
+    Args:
+        token_path: Path to the JSON token file
+
+    Returns:
+        Tuple (st_mtime_ns, st_size) of the token file
+    """
+    st = os.stat(token_path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def save_credentials_pickle(token_path, creds, signature):
+    """
+    Save a pickled copy of credentials next to their JSON token file.
+
+    Args:
+        token_path: Path to the JSON token file
+        creds: Credentials loaded from or written to the token file
+        signature: _token_signature of the JSON file the credentials
+                   correspond to
+    """
+    pickle_path = token_path + ".pkl"
+    tmp_path = pickle_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump((signature, creds), f, protocol=5)
+        os.replace(tmp_path, pickle_path)
+    except Exception:
+        # The pickle is only a cache, so failing to write it is harmless
+        pass
+
+
+def write_token(token_path, creds):
+    """
+    Save credentials to their token file.
+
+    The JSON is written to a temporary file first so that readers never see
+    a partially written token, and the pickled copy is updated alongside.
+
+    Args:
+        token_path: Path to the JSON token file
+        creds: Credentials to save
+    """
+    tmp_path = token_path + ".tmp"
+    with open(tmp_path, "w") as token:
+        token.write(creds.to_json())
+    os.replace(tmp_path, token_path)
+    # Cached credentials belong to the replaced file
+    _creds_cache.pop(token_path, None)
+    save_credentials_pickle(token_path, creds, _token_signature(token_path))
+
+
+def load_credentials(token_path):
+    """
+    Load credentials from a token file.
+
+    The pickled copy written by save_credentials_pickle is used when it was
+    saved for exactly the current JSON file (same mtime and size), which
+    avoids re-parsing the JSON. Otherwise the JSON file is parsed and the
+    pickle rewritten.
+
+    Args:
+        token_path: Path to the JSON token file
+
+    Returns:
+        Credentials loaded from the token file
+    """
+    # Taken before parsing so a concurrent rewrite can only make the
+    # pickle look stale, never make stale credentials look current
+    signature = _token_signature(token_path)
+    pickle_path = token_path + ".pkl"
+    try:
+        with open(pickle_path, "rb") as f:
+            saved_signature, creds = pickle.load(f)
+        if saved_signature == signature:
+            return creds
+    except Exception:
+        # Missing, old-format or unreadable pickle; fall back to the JSON
+        pass
+
+    creds = Credentials.from_authorized_user_file(token_path, GOOGLE_SCOPES)
+    save_credentials_pickle(token_path, creds, signature)
+    return creds
+
+
+@contextlib.contextmanager
+def token_lock(token_path):
+    """
+    Hold an exclusive lock on a token file across threads and processes.
+
+    The lock is taken on a sidecar ".lock" file so that the token file
+    itself can be replaced atomically while the lock is held.
+
+    Args:
+        token_path: Path to the token file to lock
+    """
+    with open(token_path + ".lock", "a+b") as lock_file:
+        fd = lock_file.fileno()
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def refresh_credentials(token_path, creds, mtime):
+    """
+    Refresh expired credentials and save them to their token file.
+
+    Only one caller refreshes a given token at a time. A caller that waited
+    for the lock while another refreshed the token reloads it from disk
+    instead of refreshing again, which could invalidate the refresh token.
+
+    Args:
+        token_path: Path to the token file
+        creds: The expired credentials
+        mtime: Modification time of the token file when creds were loaded
+
+    Returns:
+        Tuple (credentials, mtime) for the up-to-date token file
+    """
+    with token_lock(token_path):
+        current_mtime = os.stat(token_path).st_mtime_ns
+        if current_mtime != mtime:
+            # Someone else updated the token while we waited
+            creds = load_credentials(token_path)
+
+        if creds.expired and creds.refresh_token:
+            creds.refresh(_refresh_request)
+            write_token(token_path, creds)
+            current_mtime = os.stat(token_path).st_mtime_ns
+
+    return creds, current_mtime
+
+
+def get_account_credentials():
     """
     Get and refresh OAuth credentials for all configured accounts.
     
     Returns:
-        List of valid OAuth credentials
+        List of tuples (token_path, credentials) for accounts with valid
+        credentials
     
     Raises:
         Exception: If no valid credentials are found
@@ -72,29 +333,44 @@ def get_credentials():
     token_paths = get_token_paths()
     
     for account_name, token_path in token_paths:
-        creds = None
-        
         # Check if token exists
-        if os.path.exists(token_path):
-            try:
-                creds = Credentials.from_authorized_user_file(
-                    token_path, GOOGLE_SCOPES
-                )
-                
-                # If credentials are expired but can be refreshed
-                if creds and creds.expired and creds.refresh_token:
-                    creds.refresh(Request())
-                    # Save refreshed token
-                    with open(token_path, "w") as token:
-                        token.write(creds.to_json())
-                
-                # Add valid credentials to the list
-                if creds and creds.valid:
-                    all_creds.append(creds)
-            except Exception as e:
-                print(
-                    f"Error loading credentials for {account_name}: {str(e)}"
-                )
+        try:
+            mtime = os.stat(token_path).st_mtime_ns
+        except OSError:
+            _creds_cache.pop(token_path, None)
+            continue
+
+        # Skip the validity checks while the token file is unchanged and
+        # the cached credentials are far from expiry
+        entry = _creds_cache.get(token_path)
+        if (
+            entry
+            and entry["mtime"] == mtime
+            and time.time() < entry["expires_at"]
+        ):
+            all_creds.append((token_path, entry["creds"]))
+            continue
+
+        try:
+            # Reuse the parsed credentials while the token file is unchanged
+            if entry and entry["mtime"] == mtime:
+                creds = entry["creds"]
+            else:
+                creds = load_credentials(token_path)
+            
+            # If credentials are expired but can be refreshed
+            if creds and creds.expired and creds.refresh_token:
+                creds, mtime = refresh_credentials(token_path, creds, mtime)
+            
+            _creds_cache[token_path] = _cache_entry(creds, mtime)
+            
+            # Add valid credentials to the list
+            if creds and creds.valid:
+                all_creds.append((token_path, creds))
+        except Exception as e:
+            print(
+                f"Error loading credentials for {account_name}: {str(e)}"
+            )
     
     # If no valid credentials found, raise exception
     if not all_creds:
@@ -106,6 +382,38 @@ def get_credentials():
     return all_creds
 
 
+def get_credentials():
+    """
+    Get and refresh OAuth credentials for all configured accounts.
+    
+    Returns:
+        List of valid OAuth credentials
+    
+    Raises:
+        Exception: If no valid credentials are found
+    """
+    return [creds for _, creds in get_account_credentials()]
+
+
+def has_valid_token(token_path):
+    """
+    Check whether a token file exists and contains valid credentials.
+
+    Args:
+        token_path: Path to the token file
+
+    Returns:
+        True if the token file holds valid credentials
+    """
+    if not os.path.exists(token_path):
+        return False
+    try:
+        creds = load_credentials(token_path)
+    except Exception:
+        return False
+    return bool(creds and creds.valid)
+
+
 def initialize_google_auth(account_name=None, token_path=None):
     """
     Initialize the Google API authentication flow for both Gmail and Calendar.
@@ -131,17 +439,9 @@ def initialize_google_auth(account_name=None, token_path=None):
         
         # If token path is not provided, check if it's a known account
         if token_path is None and account_name is not None:
-            config = ConfigManager().config
-            # Check both 'google' and 'gmail' sections
-            accounts_section = config.get("google", {}).get("accounts", [])
-            if not accounts_section:
-                accounts_section = config.get("gmail", {}).get("accounts", [])
-                
-            for account in accounts_section:
-                if account.get("name") == account_name:
-                    token_path = os.path.join(
-                        config_dir, account.get("token_path")
-                    )
+            for name, path in get_token_paths():
+                if name == account_name:
+                    token_path = path
                     break
             
             # If still no token path, generate one from the account name
@@ -154,20 +454,11 @@ def initialize_google_auth(account_name=None, token_path=None):
             return "No account name provided for authentication"
         
         # Check if token already exists and is valid
-        if os.path.exists(token_path):
-            try:
-                creds = Credentials.from_authorized_user_file(
-                    token_path, GOOGLE_SCOPES
-                )
-                if creds and creds.valid:
-                    return (
-                        f"Google Gmail and Calendar API authentication for {account_name} "
-                        "is already set up."
-                    )
-            except Exception:
-                # If there's an error loading the token, continue with the
-                # auth flow
-                pass
+        if has_valid_token(token_path):
+            return (
+                f"Google {SERVICE_NAMES} API authentication for {account_name} "
+                "is already set up."
+            )
         
         # If no valid token exists, start the auth flow
         flow = InstalledAppFlow.from_client_secrets_file(cred_path, GOOGLE_SCOPES)
@@ -175,11 +466,10 @@ def initialize_google_auth(account_name=None, token_path=None):
         
         # Save the credentials for the next run
         os.makedirs(os.path.dirname(token_path), exist_ok=True)
-        with open(token_path, "w") as token:
-            token.write(creds.to_json())
+        write_token(token_path, creds)
         
         return (
-            f"Google Gmail and Calendar API authentication for {account_name} "
+            f"Google {SERVICE_NAMES} API authentication for {account_name} "
             "has been successfully set up."
         )
     except Exception as e:
@@ -203,19 +493,38 @@ def initialize_all_google_auth():
         )
     
     print(
-        f"Starting Gmail and Calendar authentication process for {len(token_paths)} "
+        f"Starting {SERVICE_NAMES} authentication process for {len(token_paths)} "
         f"Google accounts:"
     )
     for i, (account_name, _) in enumerate(token_paths, 1):
         print(f"  {i}. {account_name}")
     
-    results = ["Starting Gmail and Calendar authentication process for all accounts:"]
+    results = [
+        f"Starting {SERVICE_NAMES} authentication process for all accounts:"
+    ]
     
-    # Initialize all accounts
-    for i, (account_name, token_path) in enumerate(token_paths, 1):
+    # Validate existing tokens in parallel, since this is only disk I/O
+    with ThreadPoolExecutor(max_workers=min(8, len(token_paths))) as executor:
+        valid = list(
+            executor.map(
+                has_valid_token, [token_path for _, token_path in token_paths]
+            )
+        )
+    
+    # Run the OAuth flow only for accounts that need it. This has to stay
+    # serial because each flow opens the browser.
+    for i, ((account_name, token_path), is_valid) in enumerate(
+        zip(token_paths, valid), 1
+    ):
+        if is_valid:
+            status = (
+                f"Google {SERVICE_NAMES} API authentication for {account_name} "
+                "is already set up."
+            )
+        else:
+            status = initialize_google_auth(account_name, token_path)
         results.append(
-            f"Account {i} of {len(token_paths)} ({account_name}): "
-            f"{initialize_google_auth(account_name, token_path)}"
+            f"Account {i} of {len(token_paths)} ({account_name}): {status}"
         )
     
     return "\n".join(results)
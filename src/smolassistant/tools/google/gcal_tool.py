@@ -1,11 +1,112 @@
 import datetime
+import heapq
+import time
+from itertools import islice
+from operator import itemgetter
 from typing import Callable, List, Optional, Tuple, Dict, Any
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from smolagents import tool
 
-from .auth import get_credentials, GOOGLE_SCOPES
+from .auth import get_account_credentials, GOOGLE_SCOPES
+from .transport import build_service, run_per_account
+
+# Maximum number of calls the Google API accepts in one batch request
+MAX_BATCH_SIZE = 50
+
+# Seconds to reuse an account's calendar list before fetching it again
+CALENDAR_LIST_TTL = 300
+
+# Selected calendars of each account keyed by token path, stored together
+# with the time they were fetched
+_calendar_list_cache = {}
+
+
+def _get_selected_calendars(service, token_path):
+    """
+    Get the selected calendars of an account, reusing a recent result.
+
+    Args:
+        service: Calendar API service of the account
+        token_path: Token path of the account
+
+    Returns:
+        List of calendar list entries
+    """
+    cached = _calendar_list_cache.get(token_path)
+    if cached and time.monotonic() - cached[0] < CALENDAR_LIST_TTL:
+        return cached[1]
+
+    # Get list of calendars
+    calendar_list = service.calendarList().list().execute()
+    calendars = calendar_list.get("items", [])
+
+    # Skip calendars that might not be relevant
+    calendars = [
+        calendar for calendar in calendars
+        if calendar.get("selected", True) is not False
+    ]
+
+    _calendar_list_cache[token_path] = (time.monotonic(), calendars)
+    return calendars
+
+
+# Readable day headers keyed by YYYY-MM-DD, bounded to a year of days
+_day_header_cache = {}
+_DAY_HEADER_CACHE_SIZE = 366
+
+
+def format_day_header(day):
+    """
+    Convert a YYYY-MM-DD date to a readable day header.
+
+    Args:
+        day: Date string in YYYY-MM-DD format
+
+    Returns:
+        Day header such as "Monday, April 08"
+    """
+    header = _day_header_cache.get(day)
+    if header is None:
+        if len(_day_header_cache) >= _DAY_HEADER_CACHE_SIZE:
+            _day_header_cache.clear()
+        header = datetime.datetime.fromisoformat(day).strftime("%A, %B %d")
+        _day_header_cache[day] = header
+    return header
+
+
+def format_time_of_day(value):
+    """
+    Format the time of an ISO datetime string without parsing it.
+
+    Args:
+        value: ISO datetime string, e.g. "2024-04-08T14:05:00-05:00"
+
+    Returns:
+        12-hour time string, e.g. "2:05 PM"
+    """
+    hour = int(value[11:13])
+    am_pm = "AM" if hour < 12 else "PM"
+    return f"{hour % 12 or 12}:{value[14:16]} {am_pm}"
+
+
+def format_utc_offset(value):
+    """
+    Get the timezone label of an ISO datetime string without parsing it.
+
+    Args:
+        value: ISO datetime string, e.g. "2024-04-08T14:05:00-05:00"
+
+    Returns:
+        "UTC" or a label such as "UTC-05:00", or None if there is no offset
+    """
+    # Skip the seconds and any fractional part to reach the offset
+    offset = value[19:].lstrip(".0123456789")
+    if not offset:
+        return None
+    if offset in ("Z", "+00:00", "-00:00"):
+        return "UTC"
+    return f"UTC{offset}"
 
 
 def format_calendar_results(services_with_events: List[Tuple]):
@@ -28,42 +129,30 @@ def format_calendar_results(services_with_events: List[Tuple]):
 
     for _, events, account_idx in services_with_events:
         for event in events:
-            # Get start date/time
-            start = event["start"].get("dateTime", event["start"].get("date"))
+            # Start date/time, precomputed when the events were fetched
+            start = event["_start_key"]
 
-            # Convert to datetime object
-            if "T" in start:  # Has time component
-                start_dt = datetime.datetime.fromisoformat(
-                    start.replace("Z", "+00:00")
-                )
-                is_all_day = False
-            else:  # All-day event
-                start_dt = datetime.datetime.fromisoformat(start)
-                is_all_day = True
-
-            # Get just the date part as string for grouping
-            day_str = start_dt.strftime("%Y-%m-%d")
+            # ISO dates and datetimes both start with YYYY-MM-DD, and this
+            # prefix is the event's date in its own timezone
+            day_str = start[:10]
 
             if day_str not in events_by_day:
                 events_by_day[day_str] = []
 
-            # Add account info and processed datetime
+            # Add account info
             event["account_idx"] = account_idx
-            event["start_dt"] = start_dt
-            event["is_all_day"] = is_all_day
-            events_by_day[day_str].append(event)
+            events_by_day[day_str].append((start, event))
 
     # Sort days
     sorted_days = sorted(events_by_day.keys())
 
-    # Build the result
-    result = f"Found {total_events} upcoming events:\n\n"
+    # Build the result as a list of parts joined once at the end
+    parts = [f"Found {total_events} upcoming events:\n\n"]
 
     # Today and tomorrow for relative references
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    tomorrow = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime(
-        "%Y-%m-%d"
-    )
+    now = datetime.datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    tomorrow = (now + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
 
     for day in sorted_days:
         # Format the day header
@@ -72,87 +161,191 @@ def format_calendar_results(services_with_events: List[Tuple]):
         elif day == tomorrow:
             day_header = "Tomorrow"
         else:
-            # Convert YYYY-MM-DD to a more readable format
-            dt = datetime.datetime.fromisoformat(day)
-            day_header = dt.strftime("%A, %B %d")  # e.g., "Monday, April 8"
+            day_header = format_day_header(day)
 
-        result += f"{day_header}:\n"
+        parts.append(f"{day_header}:\n")
 
         # Add events for this day
-        for i, event in enumerate(events_by_day[day], 1):
-            # Format the event time
-            if event["is_all_day"]:
+        for i, (start, event) in enumerate(events_by_day[day], 1):
+            # Format the event time; all-day dates are exactly YYYY-MM-DD
+            if len(start) <= 10:
                 time_str = "All day"
                 # All-day events don't need timezone information
             else:
                 # Format the time
-                start_time = event["start_dt"].strftime("%I:%M %p").lstrip("0")
-                
-                # Simply get the timezone string directly from the timestamp
-                timezone_info = None
-                if hasattr(event["start_dt"], "tzinfo") and event["start_dt"].tzinfo is not None:
-                    timezone_info = str(event["start_dt"].tzinfo)
+                time_str = format_time_of_day(start)
 
                 # Get end time if available
                 if "end" in event:
                     end = event["end"].get("dateTime")
                     if end:
-                        end_dt = datetime.datetime.fromisoformat(
-                            end.replace("Z", "+00:00")
-                        )
-                        end_time = end_dt.strftime("%I:%M %p").lstrip("0")
-                        time_str = f"{start_time}-{end_time}"
-                    else:
-                        time_str = start_time
-                else:
-                    time_str = start_time
-                
+                        time_str = f"{time_str}-{format_time_of_day(end)}"
+
                 # Add timezone information if available
+                timezone_info = format_utc_offset(start)
                 if timezone_info:
                     time_str += f" ({timezone_info})"
 
             # Get summary (title)
             summary = event.get("summary", "Untitled Event")
             # Add location if available (but keep it brief)
-            location = (
-                event.get("location", "").split(",")[0]
-                if event.get("location")
-                else ""
+            location = event.get("location")
+            location_str = (
+                f" - {location.split(',', 1)[0]}" if location else ""
             )
-            location_str = f" - {location}" if location else ""
 
             # Start building the event line
             event_line = f"{i}. {summary} ({time_str}){location_str}"
 
             # Add calendar name for context (especially if multiple calendars)
-            calendar = event.get("calendarTitle", "")
+            calendar = event.get("calendarTitle")
             if calendar:
                 event_line += f" [{calendar}]"
 
-            result += f"{event_line}\n"
+            parts.append(f"{event_line}\n")
 
             # Add meeting link if present (but only the most important one)
-            conference_data = event.get("conferenceData", {})
+            conference_data = event.get("conferenceData")
             if conference_data:
-                entry_points = conference_data.get("entryPoints", [])
-                for entry in entry_points:
+                for entry in conference_data.get("entryPoints", ()):
                     if entry.get("entryPointType") == "video":
-                        result += f"   Link: {entry.get('uri', '')}\n"
+                        parts.append(f"   Link: {entry.get('uri', '')}\n")
                         break
 
             # Add a very brief description snippet if available
-            description = event.get("description", "")
+            description = event.get("description")
             if description:
                 # Extract just the first ~50 chars of description
-                desc_snippet = description.split("\n")[0][:50]
+                desc_snippet = description.split("\n", 1)[0][:50]
                 if len(desc_snippet) == 50:
                     desc_snippet += "..."
                 if desc_snippet.strip():  # Only add if not empty
-                    result += f"   Note: {desc_snippet}\n"
+                    parts.append(f"   Note: {desc_snippet}\n")
+
+            parts.append("\n")
+
+    return "".join(parts)
+
+
+def _fetch_account_events(
+    token_path, creds, idx, time_min, time_max, max_results, query=None
+):
+    """
+    Fetch the events of all selected calendars of a single account.
+
+    Args:
+        token_path: Token path of the account
+        creds: OAuth credentials for the account
+        idx: Index of the account
+        time_min: Start of the time range (ISO format)
+        time_max: End of the time range (ISO format)
+        max_results: Maximum number of events to return
+        query: Optional free text to search for in the events
+
+    Returns:
+        Tuple (service, events, account_index)
+    """
+    # Build the Calendar API service
+    service = build_service("calendar", "v3", creds, token_path)
+
+    calendars = _get_selected_calendars(service, token_path)
+
+    # Events of each calendar, in the same order as calendars
+    calendar_events = [[] for _ in calendars]
+
+    def handle_response(request_id, response, exception):
+        calendar = calendars[int(request_id)]
+        if exception is not None:
+            # Handle calendar-specific errors more gracefully
+            print(f"Error accessing calendar {calendar.get('summary', 'Unknown')}: {str(exception)}")
+            # The calendar was removed or unshared, so the cached calendar
+            # list is out of date
+            if (
+                isinstance(exception, HttpError)
+                and exception.resp.status in (404, 410)
+            ):
+                _calendar_list_cache.pop(token_path, None)
+            # Continue with other calendars rather than stopping
+            return
+
+        events = calendar_events[int(request_id)]
+        for event in response.get("items", []):
+            # Add calendar info to each event
+            event["calendarTitle"] = calendar.get(
+                "summary", "Unknown Calendar"
+            )
+            # Sortable ISO date or datetime of the start
+            start = event["start"]
+            event["_start_key"] = start.get("dateTime") or start.get("date", "")
+            events.append(event)
+
+    # Fetch the events of all calendars with as few HTTP requests as
+    # possible by batching the per-calendar calls
+    for start in range(0, len(calendars), MAX_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=handle_response)
+        for i in range(start, min(start + MAX_BATCH_SIZE, len(calendars))):
+            list_kwargs = {
+                "calendarId": calendars[i]["id"],
+                "timeMin": time_min,
+                "timeMax": time_max,
+                "maxResults": max_results,
+                "singleEvents": True,
+                "orderBy": "startTime",
+            }
+            if query:
+                # Let the API do the text search
+                list_kwargs["q"] = query
+            batch.add(
+                service.events().list(**list_kwargs), request_id=str(i)
+            )
+        batch.execute()
+
+    # Each calendar's events already come sorted by start time, so merge
+    # them instead of sorting everything again
+    all_events = heapq.merge(*calendar_events, key=itemgetter("_start_key"))
+
+    if query:
+        # The same event can match in several shared calendars
+        seen_ids = set()
+        unique_events = []
+        for event in all_events:
+            event_id = event.get("id")
+            if event_id not in seen_ids:
+                seen_ids.add(event_id)
+                unique_events.append(event)
+                if len(unique_events) == max_results:
+                    break
+        return service, unique_events, idx
+
+    # Take top max_results events
+    return service, list(islice(all_events, max_results)), idx
+
+
+def fetch_all_account_events(accounts, days, max_results, query=None):
+    """
+    Fetch upcoming events for all accounts concurrently.
+
+    Args:
+        accounts: List of tuples (token_path, credentials), one per account
+        days: Number of days to look ahead
+        max_results: Maximum number of events to return per account
+        query: Optional free text to search for in the events
+
+    Returns:
+        List of tuples (service, events, account_index), ordered by
+        account index
+    """
+    # Get current time in UTC - Fix: remove the + "Z" suffix
+    now = datetime.datetime.now(datetime.timezone.utc)
+    time_min = now.isoformat()
 
-            result += "\n"
+    # Calculate end time - Fix: remove the + "Z" suffix
+    time_max = (now + datetime.timedelta(days=days)).isoformat()
 
-    return result
+    return run_per_account(
+        _fetch_account_events,
+        accounts, time_min, time_max, max_results, query,
+    )
 
 
 def get_upcoming_events_tool(summarize_func: Optional[Callable] = None):
@@ -180,78 +373,12 @@ def get_upcoming_events_tool(summarize_func: Optional[Callable] = None):
         """
         try:
             # Get credentials for Google API
-            all_creds = get_credentials()
-
-            services_with_events = []
-
-            # Get current time in UTC - Fix: remove the + "Z" suffix
-            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-
-            # Calculate end time - Fix: remove the + "Z" suffix
-            end_time = (
-                datetime.datetime.now(datetime.timezone.utc)
-                + datetime.timedelta(days=days)
-            ).isoformat()
+            accounts = get_account_credentials()
 
-            # Process each account
-            for idx, creds in enumerate(all_creds):
-                try:
-                    # Build the Calendar API service
-                    service = build("calendar", "v3", credentials=creds)
-
-                    # Get list of calendars
-                    calendar_list = service.calendarList().list().execute()
-                    calendars = calendar_list.get("items", [])
-
-                    # For each calendar, get events
-                    all_events = []
-                    for calendar in calendars:
-                        cal_id = calendar["id"]
-                        # Skip calendars that might not be relevant
-                        if calendar.get("selected", True) is False:
-                            continue
-
-                        try:
-                            # Add better error handling for each calendar
-                            events_result = (
-                                service.events()
-                                .list(
-                                    calendarId=cal_id,
-                                    timeMin=now,
-                                    timeMax=end_time,
-                                    maxResults=max_results,
-                                    singleEvents=True,
-                                    orderBy="startTime",
-                                )
-                                .execute()
-                            )
-
-                            events = events_result.get("items", [])
-                            for event in events:
-                                # Add calendar info to each event
-                                event["calendarTitle"] = calendar.get(
-                                    "summary", "Unknown Calendar"
-                                )
-                                all_events.append(event)
-                        except HttpError as error:
-                            # Handle calendar-specific errors more gracefully
-                            print(f"Error accessing calendar {calendar.get('summary', 'Unknown')}: {str(error)}")
-                            # Continue with other calendars rather than stopping
-                            continue
-
-                    # Sort all events by start time
-                    all_events.sort(
-                        key=lambda x: x["start"].get(
-                            "dateTime", x["start"].get("date", "")
-                        )
-                    )
-
-                    # Take top max_results events
-                    all_events = all_events[:max_results]
-
-                    services_with_events.append((service, all_events, idx))
-                except Exception as e:
-                    print(f"Error processing account {idx}: {str(e)}")
+            # Query all accounts in parallel
+            services_with_events = fetch_all_account_events(
+                accounts, days, max_results
+            )
 
             # Format the results
             result = format_calendar_results(services_with_events)
@@ -306,94 +433,12 @@ def search_calendar_events_tool(summarize_func: Optional[Callable] = None):
         """
         try:
             # Get credentials for Google API
-            all_creds = get_credentials()
-
-            services_with_events = []
-
-            # Get current time in UTC - Fix: remove the + "Z" suffix
-            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-
-            # Calculate end time - Fix: remove the + "Z" suffix
-            end_time = (
-                datetime.datetime.now(datetime.timezone.utc)
-                + datetime.timedelta(days=days)
-            ).isoformat()
-
-            # Process each account
-            for idx, creds in enumerate(all_creds):
-                try:
-                    # Build the Calendar API service
-                    service = build("calendar", "v3", credentials=creds)
-
-                    # Get list of calendars
-                    calendar_list = service.calendarList().list().execute()
-                    calendars = calendar_list.get("items", [])
-
-                    # For each calendar, get events
-                    all_events = []
-                    for calendar in calendars:
-                        cal_id = calendar["id"]
-                        # Skip calendars that might not be relevant
-                        if calendar.get("selected", True) is False:
-                            continue
-
-                        try:
-                            # Add better error handling for each calendar
-                            # Get all events, then filter by query
-                            events_result = (
-                                service.events()
-                                .list(
-                                    calendarId=cal_id,
-                                    timeMin=now,
-                                    timeMax=end_time,
-                                    maxResults=max_results
-                                    * 2,  # Get more to allow for filtering
-                                    singleEvents=True,
-                                    orderBy="startTime",
-                                )
-                                .execute()
-                            )
-
-                            events = events_result.get("items", [])
-
-                            # Filter events by query text
-                            filtered_events = []
-                            for event in events:
-                                summary = event.get("summary", "").lower()
-                                description = event.get("description", "").lower()
-                                location = event.get("location", "").lower()
-
-                                if (
-                                    query.lower() in summary
-                                    or query.lower() in description
-                                    or query.lower() in location
-                                ):
-                                    # Add calendar info to event
-                                    event["calendarTitle"] = calendar.get(
-                                        "summary", "Unknown Calendar"
-                                    )
-                                    filtered_events.append(event)
-
-                            all_events.extend(filtered_events)
-                        except HttpError as error:
-                            # Handle calendar-specific errors more gracefully
-                            print(f"Error accessing calendar {calendar.get('summary', 'Unknown')}: {str(error)}")
-                            # Continue with other calendars rather than stopping
-                            continue
-
-                    # Sort all events by start time
-                    all_events.sort(
-                        key=lambda x: x["start"].get(
-                            "dateTime", x["start"].get("date", "")
-                        )
-                    )
-
-                    # Take top max_results events
-                    all_events = all_events[:max_results]
+            accounts = get_account_credentials()
 
-                    services_with_events.append((service, all_events, idx))
-                except Exception as e:
-                    print(f"Error processing account {idx}: {str(e)}")
+            # Query all accounts in parallel
+            services_with_events = fetch_all_account_events(
+                accounts, days, max_results, query
+            )
 
             # Format the results
             result = format_calendar_results(services_with_events)
@@ -1,12 +1,21 @@
 import base64
-from datetime import datetime, timedelta
+import json
+import os
+import time
 from typing import Callable, Optional
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from smolagents import tool
 
-from .auth import get_credentials, GOOGLE_SCOPES
+from ...config import ConfigManager, config_dir
+from .auth import get_account_credentials, GOOGLE_SCOPES
+from .transport import build_service, run_per_account
+
+# Maximum number of characters of each message body to include
+MAX_BODY_LENGTH = 500
+
+# File storing the last seen history ID of each account
+SYNC_STATE_PATH = os.path.join(config_dir, "gmail_state.json")
 
 
 def calculate_date_range(days):
@@ -17,102 +26,317 @@ def calculate_date_range(days):
         days: Number of days to look back
 
     Returns:
-        Date string in Gmail's search format (YYYY/MM/DD)
+        Unix timestamp string, which Gmail accepts for the after: operator
     """
-    date = datetime.now() - timedelta(days=days)
-    return date.strftime("%Y/%m/%d")
+    return str(int(time.time()) - days * 86400)
 
 
-def format_email_results(services_with_messages):
+def _fetch_one(token_path, creds, idx, query, max_results):
     """
-    Format email results from multiple accounts into a readable string.
+    Fetch the messages matching a query for a single account.
 
     Args:
-        services_with_messages: List of tuples
-                               (service, messages, account_index)
+        token_path: Token path of the account
+        creds: OAuth credentials for the account
+        idx: Index of the account
+        query: Gmail search query
+        max_results: Maximum number of messages to list (None for the
+                     API default)
 
     Returns:
-        Formatted string with email details
+        Tuple (service, messages, account_index)
     """
-    # Count total emails
-    total_emails = sum(
-        len(messages) for _, messages, _ in services_with_messages
-    )
+    # Build the Gmail API service
+    service = build_service("gmail", "v1", creds, token_path)
 
-    if total_emails == 0:
-        return "No emails found in any account."
-    result = (
-        f"Found {total_emails} emails across "
-        f"{len(services_with_messages)} accounts:\n\n"
-    )
+    list_kwargs = {"userId": "me", "q": query}
+    if max_results is not None:
+        list_kwargs["maxResults"] = max_results
 
-    for service, messages, account_idx in services_with_messages:
-        if not messages:
-            continue
+    # Call the Gmail API
+    results = service.users().messages().list(**list_kwargs).execute()
+    return service, results.get("messages", []), idx
 
-        result += f"Account {account_idx + 1}:\n"
 
-        for i, msg in enumerate(messages, 1):
-            try:
-                # Get the full message details
-                message = (
-                    service.users()
-                    .messages()
-                    .get(userId="me", id=msg["id"], format="full")
-                    .execute()
-                )
+def load_sync_state():
+    """
+    Load the per-account history ID watermarks used for incremental sync.
 
-                # Extract headers
-                headers = message.get("payload", {}).get("headers", [])
-                subject = next(
-                    (h["value"] for h in headers if h["name"] == "Subject"),
-                    "No subject",
-                )
-                sender = next(
-                    (h["value"] for h in headers if h["name"] == "From"),
-                    "Unknown sender",
-                )
-                date = next(
-                    (h["value"] for h in headers if h["name"] == "Date"),
-                    "Unknown date",
+    Returns:
+        Dictionary mapping account email addresses to history IDs
+    """
+    try:
+        with open(SYNC_STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_sync_state(state):
+    """
+    Save the per-account history ID watermarks used for incremental sync.
+
+    Args:
+        state: Dictionary mapping account email addresses to history IDs
+    """
+    tmp_path = SYNC_STATE_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, SYNC_STATE_PATH)
+
+
+def _list_new_unread(service, start_history_id):
+    """
+    List the unread messages added to a mailbox since a history ID.
+
+    Args:
+        service: Gmail API service
+        start_history_id: History ID to start from
+
+    Returns:
+        Tuple (messages, latest_history_id)
+
+    Raises:
+        HttpError: With status 404 if the history ID is too old
+    """
+    new_messages = {}
+    history_id = start_history_id
+    page_token = None
+
+    while True:
+        history_kwargs = {
+            "userId": "me",
+            "startHistoryId": start_history_id,
+            "historyTypes": ["messageAdded"],
+            "labelId": "UNREAD",
+        }
+        if page_token:
+            history_kwargs["pageToken"] = page_token
+
+        response = service.users().history().list(**history_kwargs).execute()
+        for record in response.get("history", []):
+            for added in record.get("messagesAdded", []):
+                message = added["message"]
+                new_messages[message["id"]] = message
+
+        history_id = response.get("historyId", history_id)
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+
+    # History is returned oldest first, messages().list() newest first
+    return list(reversed(new_messages.values())), history_id
+
+
+def _filter_by_query(service, messages, query):
+    """
+    Keep only the messages that currently match a query.
+
+    Messages listed from the history may have been read since they arrived
+    or fall outside the query's date range, so they are checked against a
+    listing of the query. Listing is newest first, so new messages are
+    normally all found on the first page.
+
+    Args:
+        service: Gmail API service
+        messages: List of message references to filter
+        query: Gmail search query the messages must match
+
+    Returns:
+        The messages matching the query, in their original order
+    """
+    wanted = {message["id"] for message in messages}
+    matching = set()
+    page_token = None
+
+    while wanted - matching:
+        list_kwargs = {"userId": "me", "q": query}
+        if page_token:
+            list_kwargs["pageToken"] = page_token
+
+        response = service.users().messages().list(**list_kwargs).execute()
+        for message in response.get("messages", []):
+            if message["id"] in wanted:
+                matching.add(message["id"])
+
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+
+    return [message for message in messages if message["id"] in matching]
+
+
+def _fetch_new_unread(token_path, creds, idx, query, sync_state):
+    """
+    Fetch the unread messages that arrived since the previous call for a
+    single account, falling back to a full query without a watermark.
+
+    Args:
+        token_path: Token path of the account
+        creds: OAuth credentials for the account
+        idx: Index of the account
+        query: Gmail search query the messages must match
+        sync_state: Dictionary of history ID watermarks, updated in place
+
+    Returns:
+        Tuple (service, messages, account_index)
+    """
+    # Build the Gmail API service
+    service = build_service("gmail", "v1", creds, token_path)
+
+    # The profile identifies the account and carries its current history ID
+    profile = service.users().getProfile(userId="me").execute()
+    account = profile.get("emailAddress", str(idx))
+
+    messages = None
+    last_history_id = sync_state.get(account)
+    if last_history_id:
+        try:
+            messages, history_id = _list_new_unread(service, last_history_id)
+            if messages:
+                messages = _filter_by_query(service, messages, query)
+        except HttpError as error:
+            # The watermark has expired, so start over with a full query
+            if error.resp.status != 404:
+                raise
+
+    if messages is None:
+        results = (
+            service.users().messages().list(userId="me", q=query).execute()
+        )
+        messages = results.get("messages", [])
+        history_id = profile["historyId"]
+
+    sync_state[account] = history_id
+    return service, messages, idx
+
+
+def fetch_all_accounts(accounts, query, max_results=None, sync_state=None):
+    """
+    Fetch the messages matching a query for all accounts concurrently.
+
+    Args:
+        accounts: List of tuples (token_path, credentials), one per account
+        query: Gmail search query
+        max_results: Maximum number of messages to list per account
+        sync_state: Optional dictionary of history ID watermarks; if given,
+                    only messages added since the watermark that still
+                    match the query are fetched
+
+    Returns:
+        List of tuples (service, messages, account_index), ordered by
+        account index
+    """
+    if sync_state is None:
+        return run_per_account(_fetch_one, accounts, query, max_results)
+    return run_per_account(_fetch_new_unread, accounts, query, sync_state)
+
+
+def _format_account(service, messages, account_idx):
+    """
+    Format the emails of a single account.
+
+    Args:
+        service: Gmail API service for the account
+        messages: List of message references returned by the Gmail API
+        account_idx: Index of the account
+
+    Yields:
+        Chunks of the formatted email details
+    """
+    yield f"Account {account_idx + 1}:\n"
+
+    for i, msg in enumerate(messages, 1):
+        try:
+            # Get the full message details
+            message = (
+                service.users()
+                .messages()
+                .get(userId="me", id=msg["id"], format="full")
+                .execute()
+            )
+
+            # Extract headers
+            headers = message.get("payload", {}).get("headers", [])
+            subject = next(
+                (h["value"] for h in headers if h["name"] == "Subject"),
+                "No subject",
+            )
+            sender = next(
+                (h["value"] for h in headers if h["name"] == "From"),
+                "Unknown sender",
+            )
+            date = next(
+                (h["value"] for h in headers if h["name"] == "Date"),
+                "Unknown date",
+            )
+
+            # Extract message body
+            message_body = get_message_body(message)
+
+            # Truncate message body if too long
+            if len(message_body) > MAX_BODY_LENGTH:
+                message_body = (
+                    message_body[:MAX_BODY_LENGTH] + "... [truncated]"
                 )
 
-                # Extract message body
-                message_body = get_message_body(message)
+            # Get attachments
+            attachments = get_attachments(message)
 
-                # Truncate message body if too long
-                max_body_length = 500
-                if len(message_body) > max_body_length:
-                    message_body = (
-                        message_body[:max_body_length] + "... [truncated]"
-                    )
+            # Add the message headers
+            yield (
+                f"  {i}. Subject: {subject}\n"
+                f"     From: {sender}\n"
+                f"     Date: {date}\n"
+                f"     ID: {msg['id']}\n"
+            )
 
-                # Get attachments
-                attachments = get_attachments(message)
+            # Add message body, indenting continuation lines only when
+            # there are any
+            if message_body:
+                if "\n" in message_body:
+                    message_body = message_body.replace("\n", "\n     ")
+                yield f"\n     Message:\n     {message_body}\n"
 
-                # Add to result
-                result += f"  {i}. Subject: {subject}\n"
-                result += f"     From: {sender}\n"
-                result += f"     Date: {date}\n"
-                result += f"     ID: {msg['id']}\n"
+            # Add attachments if any
+            if attachments:
+                yield "\n     Attachments:\n"
+                for attachment in attachments:
+                    yield f"     - {attachment}\n"
 
-                # Add message body
-                if message_body:
-                    formatted_body = message_body.replace("\n", "\n     ")
-                    result += f"\n     Message:\n     {formatted_body}\n"
+            yield "\n"
 
-                # Add attachments if any
-                if attachments:
-                    result += "\n     Attachments:\n"
-                    for attachment in attachments:
-                        result += f"     - {attachment}\n"
+        except HttpError as error:
+            yield f"  {i}. Error retrieving email: {str(error)}\n\n"
 
-                result += "\n"
 
-            except HttpError as error:
-                result += f"  {i}. Error retrieving email: {str(error)}\n\n"
+def format_email_results(services_with_messages):
+    """
+    Format email results from multiple accounts into a readable string.
 
-    return result
+    Args:
+        services_with_messages: List of tuples
+                               (service, messages, account_index)
+
+    Returns:
+        Formatted string with email details
+    """
+    # Only accounts with emails produce an account block
+    accounts = [entry for entry in services_with_messages if entry[1]]
+    total_emails = sum(len(messages) for _, messages, _ in accounts)
+
+    if total_emails == 0:
+        return "No emails found in any account."
+
+    def blocks():
+        yield (
+            f"Found {total_emails} emails across "
+            f"{len(services_with_messages)} accounts:\n\n"
+        )
+        for service, messages, account_idx in accounts:
+            yield from _format_account(service, messages, account_idx)
+
+    return "".join(blocks())
 
 
 def get_message_body(message):
@@ -218,12 +442,16 @@ def get_unread_emails_tool(summarize_func: Optional[Callable] = None):
     Args:
         summarize_func: Optional function to summarize text
     """
+    incremental_sync = (
+        ConfigManager().config.get("gmail", {}).get("incremental_sync", False)
+    )
 
     @tool
     def get_unread_emails(days: int = 2, summarize: bool = True) -> str:
         """
         Get unread emails from all accounts for the last specified
-        number of days.
+        number of days. If incremental sync is enabled, only unread emails
+        that arrived since the previous call are returned.
         Do not disable summarization unless you have a good reason to do so.
 
         Args:
@@ -235,39 +463,31 @@ def get_unread_emails_tool(summarize_func: Optional[Callable] = None):
         """
         try:
             # Get credentials for all accounts
-            all_creds = get_credentials()
-
-            services_with_messages = []
+            accounts = get_account_credentials()
 
-            # Process each account
-            for idx, creds in enumerate(all_creds):
-                try:
-                    # Build the Gmail API service
-                    service = build("gmail", "v1", credentials=creds)
-
-                    # Calculate the date range
-                    date_range = calculate_date_range(days)
-
-                    # Create the query
-                    query = f"is:unread after:{date_range}"
+            # Calculate the date range
+            date_range = calculate_date_range(days)
 
-                    # Call the Gmail API
-                    results = (
-                        service.users()
-                        .messages()
-                        .list(userId="me", q=query)
-                        .execute()
-                    )
-                    messages = results.get("messages", [])
+            # Create the query
+            query = f"is:unread after:{date_range}"
 
-                    # Add to the list
-                    services_with_messages.append((service, messages, idx))
-                except Exception as e:
-                    print(f"Error processing account {idx}: {str(e)}")
+            # Query all accounts in parallel
+            if incremental_sync:
+                sync_state = load_sync_state()
+                services_with_messages = fetch_all_accounts(
+                    accounts, query, sync_state=sync_state
+                )
+            else:
+                services_with_messages = fetch_all_accounts(accounts, query)
 
             # Format the results
             result = format_email_results(services_with_messages)
 
+            # Only move the watermarks forward once the emails they cover
+            # have been formatted
+            if incremental_sync:
+                save_sync_state(sync_state)
+
             # Summarize if requested and summarize_func is available
             if summarize and summarize_func:
                 try:
@@ -313,29 +533,12 @@ def search_emails_tool(summarize_func: Optional[Callable] = None):
         """
         try:
             # Get credentials for all accounts
-            all_creds = get_credentials()
-
-            services_with_messages = []
-
-            # Process each account
-            for idx, creds in enumerate(all_creds):
-                try:
-                    # Build the Gmail API service
-                    service = build("gmail", "v1", credentials=creds)
-
-                    # Call the Gmail API
-                    results = (
-                        service.users()
-                        .messages()
-                        .list(userId="me", q=query, maxResults=max_results)
-                        .execute()
-                    )
-                    messages = results.get("messages", [])
+            accounts = get_account_credentials()
 
-                    # Add to the list
-                    services_with_messages.append((service, messages, idx))
-                except Exception as e:
-                    print(f"Error processing account {idx}: {str(e)}")
+            # Query all accounts in parallel
+            services_with_messages = fetch_all_accounts(
+                accounts, query, max_results
+            )
 
             # Format the results
             result = format_email_results(services_with_messages)
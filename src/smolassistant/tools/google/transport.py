@@ -0,0 +1,151 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+
+
+# Socket timeout in seconds for pooled connections, so a stuck connection
+# cannot block a worker thread forever
+HTTP_TIMEOUT = 30
+
+
+class PooledHttp:
+    """
+    Thread-safe stand-in for httplib2.Http backed by a pool of connections.
+
+    httplib2.Http is not thread-safe, so each request checks out an idle
+    Http instance (creating one if none is free) and returns it afterwards.
+    This lets keep-alive connections to the Google APIs be reused across
+    accounts, worker threads and tool calls.
+
+    AuthorizedHttp forwards close(), timeout, connections and
+    redirect_codes to the wrapped object, so those are provided as well;
+    timeout and redirect_codes apply to every pooled instance.
+    """
+
+    def __init__(self, timeout=HTTP_TIMEOUT):
+        self._idle = queue.SimpleQueue()
+        self.timeout = timeout
+        # Connections of the most recently used instance, for callers
+        # that inspect the connections attribute
+        self._last_connections = {}
+        self.redirect_codes = build_http().redirect_codes
+
+    def request(self, *args, **kwargs):
+        """Send a request using an idle pooled connection."""
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            http = build_http()
+        # Apply the pool's settings in case they changed since the
+        # instance was last used
+        http.timeout = self.timeout
+        http.redirect_codes = self.redirect_codes
+        self._last_connections = http.connections
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            self._idle.put(http)
+
+    def close(self):
+        """Close and discard all idle pooled connections."""
+        while True:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            http.close()
+
+    @property
+    def connections(self):
+        """Open connections of the most recently used instance."""
+        return self._last_connections
+
+
+# Most accounts queried at the same time
+MAX_ACCOUNT_WORKERS = 8
+
+
+def run_per_account(fn, accounts, *args):
+    """
+    Call a function for every account concurrently.
+
+    The API calls are network-bound, so one thread per account lets the
+    accounts be queried in parallel. Accounts whose call fails are
+    reported and left out of the results.
+
+    Args:
+        fn: Function called as fn(token_path, creds, account_index, *args),
+            returning a tuple whose last item is the account index
+        accounts: List of tuples (token_path, credentials), one per account
+        *args: Further arguments passed to fn
+
+    Returns:
+        List of the results of fn, ordered by account index
+    """
+    results = []
+    if not accounts:
+        return results
+
+    workers = min(MAX_ACCOUNT_WORKERS, len(accounts))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fn, token_path, creds, idx, *args): idx
+            for idx, (token_path, creds) in enumerate(accounts)
+        }
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error processing account {futures[future]}: {str(e)}")
+
+    # Keep the output in account order regardless of completion order
+    results.sort(key=lambda item: item[-1])
+    return results
+
+
+# Connection pool shared by all Google API services
+_HTTP_POOL = PooledHttp()
+
+# Built services keyed by (token_path, service_name, version), stored
+# together with the credentials they were built for
+_service_cache = {}
+
+
+def build_service(service_name, version, creds, token_path=None):
+    """
+    Build a Google API service that sends its requests over the shared
+    connection pool.
+
+    Args:
+        service_name: Name of the API (e.g. "gmail")
+        version: Version of the API (e.g. "v1")
+        creds: OAuth credentials for the account
+        token_path: Optional token path of the account; if given, the
+                    service is cached and reused for the same credentials
+
+    Returns:
+        Google API service resource
+    """
+    key = (token_path, service_name, version)
+    if token_path is not None:
+        # Credentials are refreshed in place, so the cached service stays
+        # valid until the token file is reloaded into a new object
+        cached = _service_cache.get(key)
+        if cached and cached[0] is creds:
+            return cached[1]
+
+    authed_http = AuthorizedHttp(creds, http=_HTTP_POOL)
+    service = build(
+        service_name,
+        version,
+        http=authed_http,
+        cache_discovery=False,
+        static_discovery=True,
+    )
+
+    if token_path is not None:
+        _service_cache[key] = (creds, service)
+    return service
@@ -1,7 +1,53 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 from smolagents import tool
 from typing import Optional, Callable
 from litellm import completion
 
+# Summaries keyed by a hash of the model, prompt and text, stored with the
+# time they were created
+_summary_cache = OrderedDict()
+_summary_cache_lock = threading.Lock()
+SUMMARY_CACHE_TTL = 300  # seconds
+SUMMARY_CACHE_SIZE = 128
+
+# Texts shorter than this are returned as is rather than summarized
+MIN_SUMMARY_LENGTH = 500
+
+
+def _summary_cache_key(model_name, prompt, text):
+    """Hash the inputs of a summarization request into a cache key."""
+    return hashlib.blake2b(
+        f"{model_name}\0{prompt}\0{text}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def _get_cached_summary(key):
+    """Get a cached summary that has not expired, or None."""
+    with _summary_cache_lock:
+        entry = _summary_cache.get(key)
+        if entry is None:
+            return None
+        created_at, summary = entry
+        if time.monotonic() - created_at > SUMMARY_CACHE_TTL:
+            del _summary_cache[key]
+            return None
+        _summary_cache.move_to_end(key)
+        return summary
+
+
+def _store_summary(key, summary):
+    """Cache a summary, evicting the least recently used entries."""
+    with _summary_cache_lock:
+        _summary_cache[key] = (time.monotonic(), summary)
+        _summary_cache.move_to_end(key)
+        while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+
+
 def process_text_tool(config):
     """
     Create a tool for processing text using the configured LLM.
@@ -12,13 +58,19 @@ def process_text_tool(config):
     Returns:
         A tool function that processes text and a summarize_text function
     """
-    def summarize_text(text: str, custom_prompt: Optional[str] = None) -> str:
+    def summarize_text(
+        text: str,
+        custom_prompt: Optional[str] = None,
+        stream_callback: Optional[Callable[[str], None]] = None,
+    ) -> str:
         """
         Summarize text using the configured LLM.
         
         Args:
             text: The text to summarize
             custom_prompt: Optional custom prompt to override the default
+            stream_callback: Optional function called with each chunk of the
+                summary as it is generated
             
         Returns:
             Summarized text, or original text if summarization fails
@@ -30,6 +82,14 @@ def process_text_tool(config):
             'text_processor', {}).get('summary_prompt', 
             "Summarize the following text. Preserve key information while being concise.")
         
+        # Identical requests within the TTL reuse the previous summary
+        cache_key = _summary_cache_key(model_name, prompt, text)
+        cached_summary = _get_cached_summary(cache_key)
+        if cached_summary is not None:
+            if stream_callback:
+                stream_callback(cached_summary)
+            return cached_summary
+        
         try:
             # Prepare the message in the format expected by litellm
             messages = [
@@ -42,11 +102,24 @@ def process_text_tool(config):
                 messages=messages,
                 api_key=config.config['api_key'],
                 num_retries=config.config.get("retry", {}).get("llm_retries", 3),
-                timeout=config.config.get("retry", {}).get("llm_timeout", 60)
+                timeout=config.config.get("retry", {}).get("llm_timeout", 60),
+                stream=stream_callback is not None,
             )
             
-            # Extract the response content
-            return response.choices[0].message.content.strip()
+            if stream_callback:
+                # Pass each chunk on as it arrives while collecting the summary
+                chunks = []
+                for chunk in response:
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        stream_callback(content)
+                        chunks.append(content)
+                summary = "".join(chunks).strip()
+            else:
+                # Extract the response content
+                summary = response.choices[0].message.content.strip()
+            _store_summary(cache_key, summary)
+            return summary
         except Exception as e:
             # Return the error message to let the agent handle it
             return f"Error summarizing text: {str(e)}"
@@ -66,6 +139,10 @@ def process_text_tool(config):
         """
         if not summarize:
             return text
+        
+        # Short texts have nothing worth summarizing
+        if not custom_instructions and len(text) < MIN_SUMMARY_LENGTH:
+            return text
             
         return summarize_text(text, custom_prompt=custom_instructions)
     
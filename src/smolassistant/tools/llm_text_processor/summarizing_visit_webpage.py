@@ -1,6 +1,9 @@
 from smolagents import Tool
 from typing import Optional, Callable
 
+# VisitWebpageTool class, resolved on first use and shared by all instances
+_VisitWebpageTool = None
+
 class SummarizingVisitWebpageTool(Tool):
     """
     A wrapper around VisitWebpageTool that adds summarization capability.
@@ -33,13 +36,17 @@ class SummarizingVisitWebpageTool(Tool):
         
     def _initialize_original_tool(self):
         """Initialize the original VisitWebpageTool on first use."""
-        try:
-            from smolagents import VisitWebpageTool
-            self._original_tool = VisitWebpageTool(max_output_length=self.max_output_length)
-        except ImportError as e:
-            raise ImportError(
-                "You must install the smolagents package to use this tool."
-            ) from e
+        global _VisitWebpageTool
+        if _VisitWebpageTool is None:
+            try:
+                from smolagents import VisitWebpageTool
+            except ImportError as e:
+                raise ImportError(
+                    "You must install the smolagents package to use this tool."
+                ) from e
+            _VisitWebpageTool = VisitWebpageTool
+        self._original_tool = _VisitWebpageTool(max_output_length=self.max_output_length)
+        return self._original_tool
     
     def forward(self, url: str, summarize: bool = True) -> str:
         """
@@ -53,11 +60,10 @@ class SummarizingVisitWebpageTool(Tool):
         Returns:
             The webpage content, optionally summarized
         """
-        if not self._original_tool:
-            self._initialize_original_tool()
+        original_tool = self._original_tool or self._initialize_original_tool()
             
         # Get the original content
-        content = self._original_tool.forward(url)
+        content = original_tool.forward(url)
         
         # Return as is if summarization is not requested or no summarize function
         if not summarize or not self.summarize_func:
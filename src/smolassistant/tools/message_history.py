@@ -1,11 +1,14 @@
 """
 Message history tool for maintaining a list of recent user-assistant interactions.
 """
-from collections import deque
-from typing import List, Dict, Any, Callable
+import sys
+from typing import List, Dict, Any, Callable, Optional
 
 from smolagents import tool
 
+# Display names of the common roles, so they need not be capitalized
+_ROLE_DISPLAY = {"user": "User", "assistant": "Assistant", "system": "System"}
+
 
 class MessageHistory:
     """Stores a history of messages between the user and assistant."""
@@ -17,8 +20,17 @@ class MessageHistory:
         Args:
             max_size: Maximum number of messages to store (default: 20)
         """
-        self.messages = deque(maxlen=max_size)
+        # Roles and contents are stored separately in fixed-size ring
+        # buffers and only formatted when the history is read
+        self._roles = [None] * max_size
+        self._contents = [None] * max_size
+        self._write_idx = 0  # Slot the next message is written to
+        self._count = 0  # Number of stored messages
         self.max_size = max_size
+        # Joined history of the first _cached_count messages, or None when
+        # it has to be rebuilt
+        self._cached: Optional[str] = ""
+        self._cached_count = 0
     
     def add_message(self, role: str, content: str) -> None:
         """
@@ -28,7 +40,32 @@ class MessageHistory:
             role: The role of the message sender ("user" or "assistant")
             content: The content of the message
         """
-        self.messages.append(f"{role.capitalize()}: {content}")
+        if not self.max_size:
+            return
+        if self._count == self.max_size:
+            # The oldest message is overwritten, so rebuild on the next read
+            self._cached = None
+        else:
+            self._count += 1
+        self._roles[self._write_idx] = sys.intern(role)
+        self._contents[self._write_idx] = content
+        self._write_idx = (self._write_idx + 1) % self.max_size
+    
+    def _render(self, start: int = 0) -> str:
+        """Format and join the messages from index start onwards."""
+        roles = self._roles
+        contents = self._contents
+        size = self.max_size
+        # Slot of the oldest message
+        oldest = (self._write_idx - self._count) % size if size else 0
+        lines = []
+        for k in range(start, self._count):
+            idx = (oldest + k) % size
+            role = roles[idx]
+            lines.append(
+                f"{_ROLE_DISPLAY.get(role) or role.capitalize()}: {contents[idx]}"
+            )
+        return "\n\n".join(lines)
     
     def get_history(self) -> str:
         """
@@ -37,7 +74,17 @@ class MessageHistory:
         Returns:
             A string containing the message history
         """
-        return "\n\n".join(self.messages)
+        count = self._count
+        if not count:
+            return ""
+        if self._cached is None:
+            self._cached = self._render()
+        elif self._cached_count < count:
+            # Nothing was evicted, so only the new messages are formatted
+            new = self._render(self._cached_count)
+            self._cached = f"{self._cached}\n\n{new}" if self._cached else new
+        self._cached_count = count
+        return self._cached
 
 
 def get_message_history_tool(history: MessageHistory) -> Dict[str, Any]:
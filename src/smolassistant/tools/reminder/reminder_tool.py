@@ -1,6 +1,6 @@
+import time
 from datetime import datetime
 
-import schedule
 from smolagents import tool
 
 
@@ -36,9 +36,10 @@ def set_reminder_tool(callback_fn, reminder_service):
                 "'+' or '-' offset format."
             )
         
-        # Calculate seconds until the reminder is due
-        now = datetime.now()
-        if parsed_time <= now:
+        # Calculate seconds until the reminder is due; comparing timestamps
+        # also works for due times with a timezone offset
+        seconds_until_due = parsed_time.timestamp() - time.time()
+        if seconds_until_due <= 0:
             # Due time has already passed, trigger immediately
             formatted_message = f"🔔 REMINDER: {message}"
             callback_fn(formatted_message)
@@ -47,6 +48,7 @@ def set_reminder_tool(callback_fn, reminder_service):
         # Create the reminder through the service
         reminder_id, _ = reminder_service.create_one_time_reminder(
             message=message,
+            seconds_until_due=seconds_until_due,
             due_time=due_time
         )
         
@@ -119,6 +121,57 @@ def set_recurring_reminder_tool(callback_fn, reminder_service):
     return set_recurring_reminder
 
 
+# Format of the next run time in the reminder list
+NEXT_RUN_FORMAT = '%A, %B %d at %I:%M %p'
+
+
+def _format_next_run(job):
+    """
+    Format the next run time of a job, reusing the previous result while
+    the next run time is unchanged.
+    
+    Args:
+        job: The scheduled job of the reminder
+    """
+    next_run = job.next_run
+    if not next_run:
+        return ""
+    if getattr(job, '_cached_next_run', None) != next_run:
+        job._cached_next_run = next_run
+        job._cached_time_str = next_run.strftime(NEXT_RUN_FORMAT)
+    return job._cached_time_str
+
+
+def _format_job(i, job, is_recurring):
+    """
+    Format a scheduled reminder job as a line of the reminder list.
+    
+    Args:
+        i: Position of the reminder in the list
+        job: The scheduled job of the reminder
+        is_recurring: Whether the reminder is recurring
+    """
+    message = job.message
+    reminder_id = job.reminder_id
+    
+    # Format the next run time
+    time_str = _format_next_run(job)
+    
+    if not is_recurring:
+        if time_str:
+            return f"{i}. {message} - {time_str} (ID: {reminder_id})"
+        return f"{i}. {message} (ID: {reminder_id})"
+    
+    schedule_info = job.schedule_info
+    
+    if time_str:
+        return (
+            f"{i}. {message} - Next: {time_str}, Pattern: {schedule_info} "
+            f"(ID: {reminder_id})"
+        )
+    return f"{i}. {message} - Pattern: {schedule_info} (ID: {reminder_id})"
+
+
 def get_reminders_tool(reminder_service):
     """
     Create a tool for getting pending reminders
@@ -134,74 +187,23 @@ def get_reminders_tool(reminder_service):
         Args:
             None
         """
-        # Get all jobs with the 'reminder' or 'recurring' tag
-        one_time_jobs = schedule.get_jobs('reminder')
-        recurring_jobs = schedule.get_jobs('recurring')
-        
-        if not one_time_jobs and not recurring_jobs:
+        if not reminder_service.has_jobs():
             return "You have no pending reminders."
         
+        # Get the jobs of all one-time and recurring reminders
+        entries = reminder_service.list_reminders()
+        
         result = []
         
-        if one_time_jobs:
-            result.append("One-time reminders:")
-            for i, job in enumerate(one_time_jobs, 1):
-                # Extract the reminder ID and message from the keywords
-                reminder_id = job.job_func.keywords.get(
-                    'reminder_id', 'unknown ID'
+        for i, (job, is_recurring) in enumerate(entries, 1):
+            # Add a header at the start of each kind of reminder
+            if i == 1 or is_recurring != entries[i - 2][1]:
+                header = (
+                    "Recurring reminders:" if is_recurring
+                    else "One-time reminders:"
                 )
-                message = job.job_func.keywords.get('message', 'Reminder')
-                
-                # Format the next run time
-                next_run = job.next_run
-                if next_run:
-                    time_str = next_run.strftime('%A, %B %d at %I:%M %p')
-                    result.append(f"{i}. {message} - {time_str} (ID: {reminder_id})")
-                else:
-                    result.append(f"{i}. {message} (ID: {reminder_id})")
-        
-        if recurring_jobs:
-            if one_time_jobs:
-                result.append("\nRecurring reminders:")
-                start_idx = len(one_time_jobs) + 1
-            else:
-                result.append("Recurring reminders:")
-                start_idx = 1
-                
-            for i, job in enumerate(recurring_jobs, start_idx):
-                # Extract the reminder ID, message, and pattern information
-                reminder_id = job.job_func.keywords.get(
-                    'reminder_id', 'unknown ID'
-                )
-                message = job.job_func.keywords.get('message', 'Reminder')
-                interval = job.job_func.keywords.get('interval', 'Unknown schedule')
-                time_spec = job.job_func.keywords.get('time_spec', '')
-                
-                # Format the next run time
-                next_run = job.next_run
-                if next_run:
-                    time_str = next_run.strftime('%A, %B %d at %I:%M %p')
-                    
-                    # Format the schedule information
-                    if time_spec:
-                        schedule_info = f"{interval} at {time_spec}"
-                    else:
-                        schedule_info = interval
-                    
-                    result.append(
-                        f"{i}. {message} - Next: {time_str}, Pattern: {schedule_info} "
-                        f"(ID: {reminder_id})"
-                    )
-                else:
-                    # Format the schedule information
-                    if time_spec:
-                        schedule_info = f"{interval} at {time_spec}"
-                    else:
-                        schedule_info = interval
-                    
-                    result.append(
-                        f"{i}. {message} - Pattern: {schedule_info} (ID: {reminder_id})"
-                    )
+                result.append(f"\n{header}" if result else header)
+            result.append(_format_job(i, job, is_recurring))
         
         return "\n".join(result)
     
@@ -223,25 +225,14 @@ def cancel_reminder_tool(reminder_service):
         Args:
             reminder_id: The ID of the reminder to cancel
         """
-        # Get jobs with the specific reminder_id tag
-        jobs = schedule.get_jobs(reminder_id)
+        # Get the job of the reminder with this ID
+        job, is_recurring = reminder_service.get_job(reminder_id)
         
-        if jobs:
-            # Extract information from the first job's keywords
-            message = jobs[0].job_func.keywords.get('message', "Reminder")
-            
-            # Check if this is a recurring reminder
-            is_recurring = 'recurring' in jobs[0].tags
+        if job:
+            message = job.message
             
             if is_recurring:
-                interval = jobs[0].job_func.keywords.get('interval', '')
-                time_spec = jobs[0].job_func.keywords.get('time_spec', '')
-                
-                # Format the schedule information
-                if time_spec:
-                    schedule_info = f"{interval} at {time_spec}"
-                else:
-                    schedule_info = interval
+                schedule_info = job.schedule_info
                 
                 # Delete from database and schedule
                 success = reminder_service.delete_recurring_reminder(reminder_id)
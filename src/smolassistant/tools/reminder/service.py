@@ -1,11 +1,151 @@
+import heapq
+import itertools
+import re
+import secrets
 import sqlite3
 import threading
 import time
-import uuid
 from datetime import datetime
 
 import schedule
 
+# Intervals that map directly to a schedule.every() attribute
+BASIC_INTERVALS = frozenset({
+    # Basic intervals
+    "second", "minute", "hour", "day",
+    # Days of week
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday",
+    "sunday",
+})
+
+# schedule.every(count) attribute for each unit of a numbered interval
+COUNT_UNITS = {
+    "second": "seconds",
+    "minute": "minutes",
+    "hour": "hours",
+    "day": "days",
+}
+
+# Longest time in seconds the scheduler thread sleeps between checks, which
+# bounds drift from wall-clock changes
+MAX_IDLE_SECONDS = 60.0
+
+# Numbered intervals like "2 hours", in lower case
+COUNT_INTERVAL_RE = re.compile(r"^\s*(\d+)\s+(second|minute|hour|day)s?\s*$")
+
+
+class OneTimeJob:
+    """A one-time reminder waiting in the HeapScheduler."""
+
+    def __init__(self, reminder_id, message, seconds_until_due, callback):
+        """
+        Initialize the job
+
+        Args:
+            reminder_id: ID of the reminder
+            message: The reminder message
+            seconds_until_due: Seconds until the reminder is due
+            callback: Function to call when the reminder is due
+        """
+        self.reminder_id = reminder_id
+        self.message = message
+        self.deadline = time.time() + seconds_until_due
+        self.next_run = datetime.fromtimestamp(self.deadline)
+        self.callback = callback
+        self.cancelled = False
+
+
+class HeapScheduler:
+    """
+    Scheduler for one-time reminders backed by a min-heap of deadlines.
+
+    Adding a job is O(log n), and each tick only looks at the jobs that are
+    due instead of checking every job like schedule.run_pending(). Cancelled
+    jobs are marked and dropped lazily when they reach the top of the heap.
+    Deadlines are wall-clock timestamps, since reminders are due at a time
+    of day. The scheduler thread sleeps in wait() and is woken up as soon
+    as a job is added.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # Set when jobs were added or wake() was called since the last wait
+        self._pending_wakeup = False
+        # Tie-breaker so that jobs with the same deadline are never compared
+        self._counter = itertools.count()
+
+    def add(self, job):
+        """Schedule a job to run at its deadline."""
+        with self._lock:
+            heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+            self._pending_wakeup = True
+            self._changed.notify_all()
+
+    def wake(self):
+        """Wake up the thread waiting in wait()."""
+        with self._lock:
+            self._pending_wakeup = True
+            self._changed.notify_all()
+
+    def wait(self, timeout):
+        """
+        Wait until the timeout passes or the scheduler is woken up
+
+        A wakeup that happened since the previous wait returns immediately,
+        so jobs added while the caller was busy are not missed.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+        """
+        with self._lock:
+            if not self._pending_wakeup:
+                self._changed.wait(timeout)
+            self._pending_wakeup = False
+
+    def cancel(self, job):
+        """Cancel a job if it has not run yet."""
+        job.cancelled = True
+
+    def clear(self):
+        """Remove all jobs."""
+        with self._lock:
+            for _, _, job in self._heap:
+                job.cancelled = True
+            self._heap.clear()
+
+    def idle_seconds(self):
+        """
+        Get the number of seconds until the next job is due
+
+        Returns:
+            float: Seconds until the next deadline, or None if there are
+            no jobs
+        """
+        with self._lock:
+            # Drop cancelled jobs so they do not cause early wakeups
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            return self._heap[0][0] - time.time()
+
+    def run_due(self):
+        """Run all jobs whose deadline has passed."""
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+
+        # Run the callbacks outside the lock so they can schedule or
+        # cancel other jobs
+        for job in due:
+            if not job.cancelled:
+                job.cancelled = True
+                job.callback()
+
 
 class ReminderService:
     """
@@ -23,20 +163,97 @@ class ReminderService:
         """
         self._running = False
         self._stop_event = None
+        self._thread = None
         self._db_path = db_path
         self._reminder_queue = reminder_queue
 
-        # Create a callback function for reminders
+        # Scheduled jobs keyed by reminder ID, so that reminders can be
+        # listed and cancelled without scanning all scheduled jobs
+        self._one_time_jobs = {}
+        self._recurring_jobs = {}
+        self._jobs_lock = threading.Lock()
+
+        # One-time reminders are run from a heap rather than by schedule
+        self._heap_scheduler = HeapScheduler()
+
+        # Reminders are only handed over to the queue, so a slow consumer
+        # never holds up the scheduler thread
         self._callback_fn = None
         if reminder_queue:
-            self._callback_fn = lambda msg: reminder_queue.put(msg)
+            self._callback_fn = reminder_queue.put_nowait
+
+        # One connection shared by all threads, used under the lock
+        self._db_lock = threading.Lock()
+        self._conn = self._connect()
 
         # Initialize the database
         self._init_db()
 
+    def _connect(self):
+        """
+        Open a connection to the reminder database
+
+        The database uses write-ahead logging with synchronous=NORMAL, so a
+        commit does not wait for an fsync; the last few writes may be lost
+        on power failure, but the database stays consistent.
+
+        Returns:
+            sqlite3.Connection: The new connection
+        """
+        conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA busy_timeout=3000;"
+            "PRAGMA cache_size=-4096;"
+        )
+        return conn
+
+    def _execute(self, sql, params=()):
+        """
+        Execute a statement on the shared connection and commit it
+
+        Args:
+            sql: The SQL statement
+            params: Parameters of the statement
+
+        Returns:
+            bool: True if successful
+        """
+        with self._db_lock:
+            # The connection is closed while the service is stopped
+            if self._conn is None:
+                return False
+            try:
+                self._conn.execute(sql, params)
+                self._conn.commit()
+                return True
+            except sqlite3.Error:
+                # Log error or handle gracefully
+                self._conn.rollback()
+                return False
+
+    def _query(self, sql):
+        """
+        Run a query on the shared connection
+
+        Args:
+            sql: The SQL query
+
+        Returns:
+            list: The result rows
+        """
+        with self._db_lock:
+            # The connection is closed while the service is stopped
+            if self._conn is None:
+                return []
+            return self._conn.execute(sql).fetchall()
+
     def _init_db(self):
         """Initialize the database with required tables if they don't exist"""
-        conn = sqlite3.connect(self._db_path)
+        conn = self._conn
         cursor = conn.cursor()
 
         # Create table for one-time reminders
@@ -61,19 +278,22 @@ class ReminderService:
         """)
 
         conn.commit()
-        conn.close()
 
     def start(self):
         """
         Start the scheduler in a background thread and load saved reminders
         """
         if not self._running:
+            # Reopen the database if the service was stopped before
+            if self._conn is None:
+                self._conn = self._connect()
+
             self._stop_event = threading.Event()
 
             # Start the background thread
-            continuous_thread = threading.Thread(target=self._run_continuously)
-            continuous_thread.daemon = True
-            continuous_thread.start()
+            self._thread = threading.Thread(target=self._run_continuously)
+            self._thread.daemon = True
+            self._thread.start()
 
             self._running = True
 
@@ -83,16 +303,39 @@ class ReminderService:
     def _run_continuously(self):
         """Run the scheduler continuously until the stop event is set"""
         while not self._stop_event.is_set():
+            self._heap_scheduler.run_due()
             schedule.run_pending()
-            time.sleep(1)
+
+            # Sleep until the next job is due; adding a reminder or stop()
+            # wakes the loop immediately
+            idle = MAX_IDLE_SECONDS
+            for job_idle in (
+                self._heap_scheduler.idle_seconds(), schedule.idle_seconds(),
+            ):
+                if job_idle is not None:
+                    idle = min(idle, job_idle)
+            self._heap_scheduler.wait(max(0.0, idle))
 
     def stop(self):
         """Shutdown the scheduler"""
         if self._running:
             self._stop_event.set()
+            self._heap_scheduler.wake()
             self._running = False
+            # Let a reminder that is firing finish before the database is
+            # closed under it
+            if self._thread is not threading.current_thread():
+                self._thread.join(timeout=5)
+            self._thread = None
             # Clear all scheduled jobs
             schedule.clear()
+            self._heap_scheduler.clear()
+            with self._jobs_lock:
+                self._one_time_jobs.clear()
+                self._recurring_jobs.clear()
+            with self._db_lock:
+                self._conn.close()
+                self._conn = None
 
     def _load_reminders(self):
         """Load and recreate all reminders from the database"""
@@ -104,46 +347,43 @@ class ReminderService:
 
     def _load_one_time_reminders(self):
         """Load and recreate one-time reminders from the database"""
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM one_time_reminders")
-        reminders = cursor.fetchall()
+        reminders = self._query("SELECT * FROM one_time_reminders")
+        expired_ids = []
 
         for reminder in reminders:
-            # Parse due_time
+            # Calculate seconds until due
             due_time = datetime.fromisoformat(reminder["due_time"])
-            now = datetime.now()
-
-            # If due time is in the future, schedule it
-            if due_time > now:
-                # Calculate seconds until due
-                seconds_until_due = (due_time - now).total_seconds()
+            seconds_until_due = due_time.timestamp() - time.time()
 
-                # Recreate the reminder
-                self.create_one_time_reminder(
+            # If due time is in the future, schedule it; the row is
+            # already in the database
+            if seconds_until_due > 0:
+                self._schedule_one_time_job(
                     reminder["message"], reminder["id"], seconds_until_due,
                 )
             else:
                 # Due time has already passed, trigger immediately
                 formatted_message = f"🔔 REMINDER: {reminder['message']}"
-                if self._callback_fn:
-                    self._callback_fn(formatted_message)
-
-                # And remove from database
-                self.delete_one_time_reminder(reminder["id"])
-
-        conn.close()
+                self._callback_fn(formatted_message)
+                expired_ids.append((reminder["id"],))
+
+        # And remove the expired reminders from the database in a single
+        # transaction
+        if expired_ids:
+            with self._db_lock:
+                try:
+                    with self._conn:
+                        self._conn.executemany(
+                            "DELETE FROM one_time_reminders WHERE id = ?",
+                            expired_ids,
+                        )
+                except sqlite3.Error:
+                    # Log error or handle gracefully
+                    pass
 
     def _load_recurring_reminders(self):
         """Load and recreate recurring reminders from the database"""
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM recurring_reminders")
-        reminders = cursor.fetchall()
+        reminders = self._query("SELECT * FROM recurring_reminders")
 
         for reminder in reminders:
             # Recreate the recurring reminder
@@ -152,12 +392,12 @@ class ReminderService:
                 reminder["id"],
                 reminder["interval"],
                 reminder["time_spec"] if reminder["time_spec"] else "",
+                persist=False,
             )
 
-        conn.close()
-
     def create_one_time_reminder(
         self, message, reminder_id=None, seconds_until_due=None, due_time=None,
+        persist=True,
     ):
         """
         Create a one-time reminder in both schedule and database
@@ -169,6 +409,8 @@ class ReminderService:
             seconds_until_due: Seconds until the reminder is due
             due_time: ISO format datetime when the reminder should trigger
                       (required if seconds_until_due is not provided)
+            persist: Whether to save the reminder to the database; False
+                     when it was loaded from there
 
         Returns:
             tuple: (reminder_id, job)
@@ -178,7 +420,7 @@ class ReminderService:
 
         # Generate a unique ID if not provided
         if not reminder_id:
-            reminder_id = f"reminder_{uuid.uuid4()}"
+            reminder_id = f"reminder_{secrets.token_hex(8)}"
 
         # If seconds_until_due not provided, calculate from due_time
         if seconds_until_due is None:
@@ -187,57 +429,61 @@ class ReminderService:
 
             try:
                 parsed_time = datetime.fromisoformat(due_time)
-                now = datetime.now()
-                seconds_until_due = (parsed_time - now).total_seconds()
+                seconds_until_due = parsed_time.timestamp() - time.time()
             except (ValueError, TypeError):
                 return None, None
 
+        # Save to database if due_time is provided
+        if persist and due_time and seconds_until_due > 0:
+            self._execute(
+                (
+                    "INSERT OR REPLACE INTO one_time_reminders "
+                    "VALUES (?, ?, ?, ?)"
+                ),
+                (
+                    reminder_id,
+                    message,
+                    due_time,
+                    datetime.now().isoformat(),
+                ),
+            )
+
+        # Schedule only once saved, so that a reminder due right away
+        # cannot be deleted from the database before it is inserted
+        job = self._schedule_one_time_job(message, reminder_id, seconds_until_due)
+
+        return reminder_id, job
+
+    def _schedule_one_time_job(self, message, reminder_id, seconds_until_due):
+        """
+        Schedule a one-time reminder without touching the database
+
+        Args:
+            message: The reminder message
+            reminder_id: ID of the reminder
+            seconds_until_due: Seconds until the reminder is due
+
+        Returns:
+            OneTimeJob: The scheduled job
+        """
         # Define the job function
-        def reminder_job(message=None, reminder_id=None):
+        def reminder_job():
             formatted_message = f"🔔 REMINDER: {message}"
             self._callback_fn(formatted_message)
 
             # Remove from database
             self.delete_one_time_reminder(reminder_id)
 
-            # Return CancelJob to remove the job after it runs
-            return schedule.CancelJob
-
-        # Schedule the job
-        job = schedule.every(seconds_until_due).seconds.do(
-            reminder_job, message=message, reminder_id=reminder_id,
-        )
-        job.tag("reminder", reminder_id)
-
-        # Save to database if due_time is provided
-        if due_time and seconds_until_due > 0:
-            conn = sqlite3.connect(self._db_path)
-            cursor = conn.cursor()
-
-            try:
-                cursor.execute(
-                    (
-                        "INSERT OR REPLACE INTO one_time_reminders "
-                        "VALUES (?, ?, ?, ?)"
-                     ),
-                    (
-                        reminder_id,
-                        message,
-                        due_time,
-                        datetime.now().isoformat(),
-                    ),
-                )
-                conn.commit()
-            except sqlite3.Error:
-                # Log error or handle gracefully
-                pass
-            finally:
-                conn.close()
-
-        return reminder_id, job
+        # Create the job that runs at the due time
+        job = OneTimeJob(reminder_id, message, seconds_until_due, reminder_job)
+        with self._jobs_lock:
+            self._one_time_jobs[reminder_id] = job
+        self._heap_scheduler.add(job)
+        return job
 
     def create_recurring_reminder(
         self, message, reminder_id=None, interval=None, time_spec="",
+        persist=True,
     ):
         """
         Create a recurring reminder in both schedule and database
@@ -248,6 +494,8 @@ class ReminderService:
                          (generated if not provided)
             interval: The recurrence pattern
             time_spec: Optional time specification
+            persist: Whether to save the reminder to the database; False
+                     when it was loaded from there
 
         Returns:
             tuple: (reminder_id, job)
@@ -257,7 +505,7 @@ class ReminderService:
 
         # Generate a unique ID if not provided
         if not reminder_id:
-            reminder_id = f"recurring_{uuid.uuid4()}"
+            reminder_id = f"recurring_{secrets.token_hex(8)}"
 
         # Define the job function
         def reminder_job(
@@ -274,103 +522,57 @@ class ReminderService:
                 )
             self._callback_fn(formatted_message)
 
-        # Create mapped dictionaries for the schedule methods
-        interval_methods = {
-            # Basic intervals
-            "second": schedule.every().second,
-            "minute": schedule.every().minute,
-            "hour": schedule.every().hour,
-            "day": schedule.every().day,
-            # Days of week
-            "monday": schedule.every().monday,
-            "tuesday": schedule.every().tuesday,
-            "wednesday": schedule.every().wednesday,
-            "thursday": schedule.every().thursday,
-            "friday": schedule.every().friday,
-            "saturday": schedule.every().saturday,
-            "sunday": schedule.every().sunday,
-        }
-
         job = None
         display_interval = interval.lower()
+        job_kwargs = {
+            "message": message,
+            "reminder_id": reminder_id,
+            "interval": display_interval,
+            "time_spec": time_spec,
+        }
 
         # Check for numbered intervals like "2 hours"
-        interval_parts = interval.lower().split()
-        if len(interval_parts) == 2 and interval_parts[0].isdigit():
-            count = int(interval_parts[0])
-            unit = interval_parts[1]
-
-            # Handle plural forms by removing trailing 's'
-            if unit.endswith("s"):
-                unit = unit[:-1]
+        count_match = COUNT_INTERVAL_RE.match(display_interval)
+        if count_match:
+            count = int(count_match.group(1))
 
             # Map the unit to the correct schedule method
-            if unit == "second":
-                job = schedule.every(count).seconds.do(
-                    reminder_job,
-                    message=message,
-                    reminder_id=reminder_id,
-                    interval=display_interval,
-                    time_spec=time_spec,
-                )
-            elif unit == "minute":
-                job = schedule.every(count).minutes.do(
-                    reminder_job,
-                    message=message,
-                    reminder_id=reminder_id,
-                    interval=display_interval,
-                    time_spec=time_spec,
-                )
-            elif unit == "hour":
-                job = schedule.every(count).hours.do(
-                    reminder_job,
-                    message=message,
-                    reminder_id=reminder_id,
-                    interval=display_interval,
-                    time_spec=time_spec,
-                )
-            elif unit == "day":
-                job = schedule.every(count).days.do(
-                    reminder_job,
-                    message=message,
-                    reminder_id=reminder_id,
-                    interval=display_interval,
-                    time_spec=time_spec,
-                )
-        else:
+            unit_method = COUNT_UNITS[count_match.group(2)]
+            job = getattr(schedule.every(count), unit_method).do(
+                reminder_job, **job_kwargs,
+            )
+        elif display_interval in BASIC_INTERVALS:
             # Handle standard intervals
-            method = interval_methods.get(interval.lower())
-
-            if method:
-                if time_spec:
-                    # With time specification
-                    job = method.at(time_spec).do(
-                        reminder_job,
-                        message=message,
-                        reminder_id=reminder_id,
-                        interval=display_interval,
-                        time_spec=time_spec,
-                    )
-                else:
-                    # Without time specification
-                    job = method.do(
-                        reminder_job,
-                        message=message,
-                        reminder_id=reminder_id,
-                        interval=display_interval,
-                        time_spec=time_spec,
-                    )
+            method = getattr(schedule.every(), display_interval)
+
+            if time_spec:
+                # With time specification
+                job = method.at(time_spec).do(reminder_job, **job_kwargs)
+            else:
+                # Without time specification
+                job = method.do(reminder_job, **job_kwargs)
 
         if job:
             # Tag the job for identification and management
             job.tag("recurring", reminder_id)
 
-            # Save to database
-            conn = sqlite3.connect(self._db_path)
-            cursor = conn.cursor()
+            # Details shown when listing reminders; they never change
+            job.reminder_id = reminder_id
+            job.message = message
+            if time_spec:
+                job.schedule_info = f"{display_interval} at {time_spec}"
+            else:
+                job.schedule_info = display_interval
 
-            try:
-                cursor.execute(
+            with self._jobs_lock:
+                self._recurring_jobs[reminder_id] = job
+
+            # Let the scheduler thread recompute how long it can sleep
+            self._heap_scheduler.wake()
+
+            # Save to database
+            if persist:
+                self._execute(
                     (
                         "INSERT OR REPLACE INTO recurring_reminders "
                         "VALUES (?, ?, ?, ?, ?)"
@@ -383,12 +585,6 @@ class ReminderService:
                         datetime.now().isoformat(),
                     ),
                 )
-                conn.commit()
-            except sqlite3.Error:
-                # Log error or handle gracefully
-                pass
-            finally:
-                conn.close()
 
         return reminder_id, job
 
@@ -403,22 +599,15 @@ class ReminderService:
             bool: True if successful
         """
         # Clear the job from schedule
-        schedule.clear(reminder_id)
+        with self._jobs_lock:
+            job = self._one_time_jobs.pop(reminder_id, None)
+        if job:
+            self._heap_scheduler.cancel(job)
 
         # Remove from database
-        conn = sqlite3.connect(self._db_path)
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
-                "DELETE FROM one_time_reminders WHERE id = ?", (reminder_id,),
-            )
-            conn.commit()
-            success = True
-        except sqlite3.Error:
-            success = False
-        finally:
-            conn.close()
+        success = self._execute(
+            "DELETE FROM one_time_reminders WHERE id = ?", (reminder_id,),
+        )
 
         return success
 
@@ -433,25 +622,55 @@ class ReminderService:
             bool: True if successful
         """
         # Clear the job from schedule
-        schedule.clear(reminder_id)
+        with self._jobs_lock:
+            job = self._recurring_jobs.pop(reminder_id, None)
+        if job:
+            schedule.cancel_job(job)
 
         # Remove from database
-        conn = sqlite3.connect(self._db_path)
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
-                "DELETE FROM recurring_reminders WHERE id = ?", (reminder_id,),
-            )
-            conn.commit()
-            success = True
-        except sqlite3.Error:
-            success = False
-        finally:
-            conn.close()
+        success = self._execute(
+            "DELETE FROM recurring_reminders WHERE id = ?", (reminder_id,),
+        )
 
         return success
 
+    def has_jobs(self):
+        """
+        Check whether any reminders are scheduled
+
+        Returns:
+            bool: True if there is at least one one-time or recurring job
+        """
+        return bool(self._one_time_jobs or self._recurring_jobs)
+
+    def list_reminders(self):
+        """
+        Get the scheduled jobs of all reminders, one-time reminders first
+
+        Returns:
+            list: List of tuples (job, is_recurring)
+        """
+        with self._jobs_lock:
+            entries = [(job, False) for job in self._one_time_jobs.values()]
+            entries.extend((job, True) for job in self._recurring_jobs.values())
+        return entries
+
+    def get_job(self, reminder_id):
+        """
+        Get the scheduled job of a reminder
+
+        Args:
+            reminder_id: ID of the reminder
+
+        Returns:
+            tuple: (job, is_recurring), with job None if not found
+        """
+        with self._jobs_lock:
+            job = self._one_time_jobs.get(reminder_id)
+            if job:
+                return job, False
+            return self._recurring_jobs.get(reminder_id), True
+
     def get_one_time_reminders(self):
         """
         Get all one-time reminders from the database
@@ -459,15 +678,8 @@ class ReminderService:
         Returns:
             list: List of dictionaries containing reminder data
         """
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM one_time_reminders")
-        reminders = [dict(reminder) for reminder in cursor.fetchall()]
-
-        conn.close()
-        return reminders
+        rows = self._query("SELECT * FROM one_time_reminders")
+        return [dict(reminder) for reminder in rows]
 
     def get_recurring_reminders(self):
         """
@@ -476,12 +688,5 @@ class ReminderService:
         Returns:
             list: List of dictionaries containing reminder data
         """
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM recurring_reminders")
-        reminders = [dict(reminder) for reminder in cursor.fetchall()]
-
-        conn.close()
-        return reminders
+        rows = self._query("SELECT * FROM recurring_reminders")
+        return [dict(reminder) for reminder in rows]
@@ -9,6 +9,48 @@ import html
 import re
 
 
+# Patterns for the tags allowed by Telegram
+ALLOWED_PATTERNS = [
+    # Simple tags
+    r"<b>.*?</b>",
+    r"<strong>.*?</strong>",
+    r"<i>.*?</i>",
+    r"<em>.*?</em>",
+    r"<u>.*?</u>",
+    r"<ins>.*?</ins>",
+    r"<s>.*?</s>",
+    r"<strike>.*?</strike>",
+    r"<del>.*?</del>",
+    r"<span class=\"tg-spoiler\">.*?</span>",
+    r"<tg-spoiler>.*?</tg-spoiler>",
+    r"<code>.*?</code>",
+    r"<pre>.*?</pre>",
+    r"<blockquote>.*?</blockquote>",
+    r"<blockquote expandable>.*?</blockquote>",
+    
+    # Complex tags
+    r"<a href=\"(?:http[s]?://[^\"]+|tg://[^\"]+)\">.*?</a>",
+    r"<pre><code class=\"language-[a-zA-Z0-9]+\">.*?</code></pre>",
+    r"<tg-emoji emoji-id=\"[0-9]+\">.*?</tg-emoji>",
+]
+
+# Regular expressions compiled once rather than on every message
+_ALLOWED_RE = re.compile("|".join(ALLOWED_PATTERNS), re.DOTALL)
+_BR_RE = re.compile(r"<br\s*/?>|<\s*/\s*br>", re.IGNORECASE)
+_ENTITY_RE = re.compile(r"&([a-zA-Z0-9]+);")
+
+# Entities kept as they are rather than unescaped
+_KEPT_ENTITIES = frozenset({"lt", "gt", "amp", "quot"})
+
+
+def _replace_entity(match, kept=_KEPT_ENTITIES):
+    """Unescape an HTML entity unless it is one of the kept entities."""
+    entity = match.group(1)
+    if entity in kept:
+        return match.group(0)
+    return html.unescape(match.group(0))
+
+
 def sanitize_telegram_html(text):
     """
     Sanitize a message to ensure it only contains HTML tags allowed by Telegram
@@ -23,68 +65,37 @@ def sanitize_telegram_html(text):
     if not text:
         return text
     
-    # Replace <br> tags with newlines first
-    text = re.sub(r"<br\s*/?>|<\s*/\s*br>", "\n", text, flags=re.IGNORECASE)
-    
-    # Define patterns for allowed tags
-    allowed_patterns = [
-        # Simple tags
-        r"<b>.*?</b>",
-        r"<strong>.*?</strong>",
-        r"<i>.*?</i>",
-        r"<em>.*?</em>",
-        r"<u>.*?</u>",
-        r"<ins>.*?</ins>",
-        r"<s>.*?</s>",
-        r"<strike>.*?</strike>",
-        r"<del>.*?</del>",
-        r"<span class=\"tg-spoiler\">.*?</span>",
-        r"<tg-spoiler>.*?</tg-spoiler>",
-        r"<code>.*?</code>",
-        r"<pre>.*?</pre>",
-        r"<blockquote>.*?</blockquote>",
-        r"<blockquote expandable>.*?</blockquote>",
-        
-        # Complex tags
-        r"<a href=\"(?:http[s]?://[^\"]+|tg://[^\"]+)\">.*?</a>",
-        r"<pre><code class=\"language-[a-zA-Z0-9]+\">.*?</code></pre>",
-        r"<tg-emoji emoji-id=\"[0-9]+\">.*?</tg-emoji>",
-    ]
+    # Without any '<' there are no tags, so the whole text is just escaped
+    if "<" not in text:
+        return html.escape(text, quote=False)
     
-    # Combine all patterns into a single pattern
-    allowed_tags_pattern = "|".join(allowed_patterns)
+    # Replace <br> tags with newlines first
+    text = _BR_RE.sub("\n", text)
     
     # Split the text into allowed tags and non-tag text
     parts = []
     last_end = 0
     
-    for match in re.finditer(allowed_tags_pattern, text, re.DOTALL):
+    for match in _ALLOWED_RE.finditer(text):
         start, end = match.span()
         
         # Add text before the tag (escaped)
         if start > last_end:
-            parts.append(html.escape(text[last_end:start]))
+            parts.append(html.escape(text[last_end:start], quote=False))
         
-        # Add the tag (unescaped)
-        parts.append(match.group(0))
+        # Add the tag (unescaped), replacing HTML entities (except &lt;,
+        # &gt;, &amp;, &quot;) with their corresponding characters
+        tag = match.group(0)
+        if "&" in tag:
+            tag = _ENTITY_RE.sub(_replace_entity, tag)
+        parts.append(tag)
         
         last_end = end
     
     # Add any remaining text
     if last_end < len(text):
-        parts.append(html.escape(text[last_end:]))
-    
-    # Join parts together
-    sanitized_text = "".join(parts)
-    
-    # Replace HTML entities (except &lt;, &gt;, &amp;, &quot;)
-    # with their corresponding characters
-    def replace_entity(match):
-        entity = match.group(1)
-        if entity in ["lt", "gt", "amp", "quot"]:
-            return f"&{entity};"
-        return html.unescape(f"&{entity};")
-    
-    sanitized_text = re.sub(r"&([a-zA-Z0-9]+);", replace_entity, sanitized_text)
+        parts.append(html.escape(text[last_end:], quote=False))
     
-    return sanitized_text
+    # Join parts together; escaped text only contains kept entities, so
+    # it needs no second pass
+    return "".join(parts)
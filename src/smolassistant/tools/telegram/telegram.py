@@ -1,9 +1,18 @@
+import queue
 import threading
 
 import telebot
+from telebot.types import LinkPreviewOptions
 
 from .html_sanitizer import sanitize_telegram_html
 
+# Maximum length of a single Telegram message
+MAX_MESSAGE_LENGTH = 4096
+
+# Responses are sent without link previews, which Telegram would otherwise
+# have to fetch for every URL
+NO_LINK_PREVIEW = LinkPreviewOptions(is_disabled=True)
+
 
 def create_telegram_bot(message_queue, token, config, authorized_user_id=None):
     """
@@ -81,23 +90,103 @@ def create_telegram_bot(message_queue, token, config, authorized_user_id=None):
         print(f"Received message from Telegram: {message.text}")
         message_queue.put(message.text)
     
+    # Responses waiting to be sent by the sender thread
+    outgoing = queue.Queue()
+    
+    def text_length(text):
+        """
+        Get the length of a message as Telegram counts it, in UTF-16 code
+        units, so that emoji count twice
+        """
+        return len(text.encode("utf-16-le")) // 2
+    
+    def sanitize(response):
+        """
+        Sanitize the HTML of a response before sending it to Telegram
+        
+        Returns:
+            str: The sanitized response, or None if sanitizing failed
+        """
+        try:
+            return sanitize_telegram_html(response)
+        except Exception as e:
+            print(f"Error sanitizing message for Telegram: {str(e)}")
+            return None
+    
+    def send(text):
+        """
+        Send a message to the authorized user
+        
+        Returns:
+            bool: True if the message was sent
+        """
+        try:
+            bot.send_message(
+                _authorized_user_id,
+                text,
+                link_preview_options=NO_LINK_PREVIEW,
+            )
+            print(f"Sent response to Telegram user: {text[:50]}")
+            return True
+        except Exception as e:
+            print(f"Error sending message to Telegram: {str(e)}")
+            return False
+    
+    def send_pending():
+        """
+        Send queued responses to the authorized user, combining responses
+        that arrive in a burst into as few messages as possible
+        """
+        pending = None
+        while True:
+            # Each response is sanitized on its own so tags never pair
+            # across responses
+            first = pending or sanitize(outgoing.get())
+            pending = None
+            if first is None:
+                continue
+            parts = [first]
+            length = text_length(first)
+            
+            while True:
+                try:
+                    response = outgoing.get_nowait()
+                except queue.Empty:
+                    break
+                part = sanitize(response)
+                if part is None:
+                    continue
+                part_length = text_length(part)
+                if length + 2 + part_length > MAX_MESSAGE_LENGTH:
+                    # Keep it for the next message
+                    pending = part
+                    break
+                parts.append(part)
+                length += 2 + part_length
+            
+            # If the combined message is rejected, send the responses one
+            # at a time so one bad response does not lose the others
+            if not send("\n\n".join(parts)) and len(parts) > 1:
+                for part in parts:
+                    send(part)
+    
+    sender_thread = threading.Thread(target=send_pending)
+    sender_thread.daemon = True
+    sender_thread.start()
+    
     # Function to send responses back to the user
     def send_response(response):
         """
         Send a response back to the authorized user
         
+        The response is queued and sent from a background thread, so the
+        caller does not wait for the Telegram API.
+        
         Args:
             response: The text response to send
         """
-        nonlocal _authorized_user_id
-        if _authorized_user_id:
-            try:
-                # Sanitize the HTML before sending to Telegram
-                sanitized_response = sanitize_telegram_html(response)
-                bot.send_message(_authorized_user_id, sanitized_response)
-                print(f"Sent response to Telegram user: {sanitized_response[:50]}")
-            except Exception as e:
-                print(f"Error sending message to Telegram: {str(e)}")
+        if _authorized_user_id and response:
+            outgoing.put(response)
     
     return bot, send_response
 